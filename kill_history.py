@@ -0,0 +1,139 @@
+import math
+import sqlite3
+import time
+from zone_registry import normalize_name
+
+# Kill intervals outside this range (seconds) are never respawn times
+MIN_RESPAWN = 60
+MAX_RESPAWN = 7 * 24 * 3600
+# Until a mob has this many intervals, only ones within REFERENCE_SPREAD of
+# the zone timer count; after that, ones within it of the learned mean
+MIN_SAMPLES = 3
+REFERENCE_SPREAD = (0.5, 2.0)
+# A learned time is only suggested while its band (two standard deviations)
+# is at most this fraction of it
+MAX_RELATIVE_BAND = 0.25
+# Pending writes are committed at most this often (seconds)
+COMMIT_INTERVAL = 10
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS names (
+    id INTEGER PRIMARY KEY,
+    name TEXT NOT NULL UNIQUE
+);
+CREATE TABLE IF NOT EXISTS spawns (
+    zone_id INTEGER NOT NULL,
+    mob_id INTEGER NOT NULL,
+    last_kill REAL NOT NULL,
+    samples INTEGER NOT NULL,
+    mean REAL NOT NULL,
+    m2 REAL NOT NULL,
+    PRIMARY KEY (zone_id, mob_id)
+) WITHOUT ROWID;
+"""
+
+
+class KillHistory:
+    """Respawn times learned from the kills seen in the logs.
+
+    One row per (zone, mob) holds the last kill time and running (Welford)
+    statistics of the intervals between kills of that mob, so the database
+    stays the same size however many months of logs are read. Zone and mob
+    names are interned into integer ids. Everything is loaded into dicts at
+    startup, so recording a kill or looking up a suggestion is O(1); writes
+    go to SQLite in batches.
+
+    Re-kill intervals also cover placeholder cycles: a placeholder and its
+    named share the spawn point, so each name learns the spawn's timer.
+    Intervals far from the expected time (several mobs sharing a name,
+    breaks from camping) are ignored.
+    """
+
+    def __init__(self, db_path):
+        self.db_path = db_path
+        self.ids = {}  # {normalized name: id}
+        self.spawns = {}  # {(zone_id, mob_id): [last_kill, samples, mean, m2]}
+        self.next_id = 1
+        self.dirty = set()
+        self.last_commit = time.monotonic()
+        try:
+            self.db = sqlite3.connect(db_path)
+            self.db.executescript(SCHEMA)
+            self.ids = dict(self.db.execute("SELECT name, id FROM names"))
+            self.next_id = max(self.ids.values(), default=0) + 1
+            for zone_id, mob_id, *stats in self.db.execute("SELECT * FROM spawns"):
+                self.spawns[(zone_id, mob_id)] = stats
+        except sqlite3.Error as e:
+            print(f"Kill history unavailable: {e}")
+            self.db = None
+
+    def intern(self, name):
+        key = normalize_name(name)
+        name_id = self.ids.get(key)
+        if name_id is None:
+            name_id = self.ids[key] = self.next_id
+            self.next_id += 1
+            if self.db:
+                self.db.execute("INSERT OR IGNORE INTO names (id, name) VALUES (?, ?)",
+                                (name_id, key))
+        return name_id
+
+    def record(self, zone, mob, killed_at, zone_timer=None):
+        """Learn from a kill of `mob` in `zone` at epoch time killed_at."""
+        key = (self.intern(zone), self.intern(mob))
+        spawn = self.spawns.get(key)
+        if spawn is None:
+            self.spawns[key] = [killed_at, 0, 0.0, 0.0]
+            self.mark_dirty(key)
+            return
+        interval = killed_at - spawn[0]
+        if interval <= 0:
+            return  # An older line, e.g. from a re-read backlog
+        spawn[0] = killed_at
+        reference = spawn[2] if spawn[1] >= MIN_SAMPLES else zone_timer
+        if (MIN_RESPAWN <= interval <= MAX_RESPAWN and (
+                not reference or
+                REFERENCE_SPREAD[0] * reference <= interval <= REFERENCE_SPREAD[1] * reference)):
+            spawn[1] += 1
+            delta = interval - spawn[2]
+            spawn[2] += delta / spawn[1]
+            spawn[3] += delta * (interval - spawn[2])
+        self.mark_dirty(key)
+
+    def suggest(self, zone, mob):
+        """(seconds, low, high) learned for the mob, or None while there is
+        too little or too scattered data."""
+        zone_id = self.ids.get(normalize_name(zone))
+        mob_id = self.ids.get(normalize_name(mob))
+        spawn = self.spawns.get((zone_id, mob_id))
+        if not spawn or spawn[1] < MIN_SAMPLES:
+            return None
+        _, samples, mean, m2 = spawn
+        band = 2 * math.sqrt(m2 / (samples - 1))
+        if band > MAX_RELATIVE_BAND * mean:
+            return None
+        return round(mean), max(0, round(mean - band)), round(mean + band)
+
+    def mark_dirty(self, key):
+        self.dirty.add(key)
+        if time.monotonic() - self.last_commit >= COMMIT_INTERVAL:
+            self.commit()
+
+    def commit(self):
+        self.last_commit = time.monotonic()
+        if not self.db or not self.dirty:
+            return
+        try:
+            self.db.executemany(
+                "INSERT OR REPLACE INTO spawns VALUES (?, ?, ?, ?, ?, ?)",
+                [key + tuple(self.spawns[key]) for key in self.dirty])
+            self.db.commit()
+        except sqlite3.Error as e:
+            print(f"Error saving kill history: {e}")
+        self.dirty.clear()
+
+    def close(self):
+        self.commit()
+        if self.db:
+            self.db.close()
+            self.db = None
@@ -0,0 +1,117 @@
+import re
+from collections import OrderedDict, namedtuple
+
+# Typed results of the built-in line rules
+ZoneEntered = namedtuple("ZoneEntered", ["zone"])
+WhoZone = namedtuple("WhoZone", ["who_name"])
+MobSlain = namedtuple("MobSlain", ["mob", "killer"])
+
+# Built-in rules as (result type, first word, keyword, regex). A rule is
+# dispatched on the line's first word when it has one, otherwise on a
+# keyword found anywhere in the line; the regex then extracts the result
+# type's fields from the start of the line, one group per field (missing
+# trailing fields are None).
+BUILTIN_RULES = (
+    (ZoneEntered, b"You", None, rb"You have entered (.+?)\."),
+    (MobSlain, b"You", None, rb"You have slain (.+?)!"),
+    (WhoZone, b"There", None, rb"There (?:is 1 player|are \d+ players) in (.+?)\."),
+    (MobSlain, None, b" has been slain by ", rb"(.+?) has been slain by (.+?)!?$"),
+)
+
+
+class LineClassifier:
+    """Recognizes the built-in log line types in one pass.
+
+    The rules sharing a first word (or keyword) are compiled into a single
+    alternation, so a line costs one dict lookup and at most one regex
+    match for prefix rules, plus one keyword search for the rest, however
+    many rules there are.
+    """
+
+    def __init__(self, rules=BUILTIN_RULES):
+        by_word = {}
+        by_keyword = {}
+        for result_type, word, keyword, pattern in rules:
+            bucket = by_word.setdefault(word, []) if word else by_keyword.setdefault(keyword, [])
+            bucket.append((result_type, pattern))
+        self.prefix_rules = {word: self.compile(rules) for word, rules in by_word.items()}
+        self.keyword_rules = {keyword: self.compile(rules) for keyword, rules in by_keyword.items()}
+        self.keyword_re = re.compile(b"|".join(
+            re.escape(keyword) for keyword in by_keyword)) if by_keyword else None
+
+    @staticmethod
+    def compile(rules):
+        # Each rule becomes one wrapping group; match.lastindex names the
+        # wrapper of the rule that matched and its fields follow it
+        alternatives = []
+        types = {}
+        group = 1
+        for result_type, pattern in rules:
+            groups = re.compile(pattern).groups
+            types[group] = (result_type, groups)
+            alternatives.append(b"(" + pattern + b")")
+            group += groups + 1
+        return re.compile(b"|".join(alternatives)), types
+
+    def classify(self, line):
+        """Return the typed result for a timestamp-stripped line (bytes
+        fields), or None if no built-in rule matches."""
+        space = line.find(b" ")
+        rules = self.prefix_rules.get(line[:space] if space != -1 else line)
+        if rules:
+            result = self.apply(rules, line)
+            if result:
+                return result
+        if self.keyword_re:
+            keyword = self.keyword_re.search(line)
+            if keyword:
+                return self.apply(self.keyword_rules[keyword.group(0)], line)
+        return None
+
+    @staticmethod
+    def apply(rules, line):
+        regex, types = rules
+        match = regex.match(line)
+        if not match:
+            return None
+        result_type, groups = types[match.lastindex]
+        start = match.lastindex + 1
+        fields = [match.group(group) for group in range(start, start + groups)]
+        fields += [None] * (len(result_type._fields) - groups)
+        return result_type._make(fields)
+
+
+DIGIT_RUN_RE = re.compile(rb"\d+")
+
+
+class LineShapeCache:
+    """Bounded LRU of line templates known to produce no events.
+
+    A line's template is the line with every run of digits masked, so
+    "a bat hits YOU for 3 points of damage." and "... for 12 points ..."
+    share one entry. Once a template is learned to match nothing, further
+    lines with it are dropped after a single hash lookup. Masking is turned
+    off when some trigger pattern contains digits, since then the numbers
+    decide whether a line matches.
+    """
+
+    def __init__(self, max_size=4096, mask_digits=True):
+        self.max_size = max_size
+        self.mask_digits = mask_digits
+        self.idle = OrderedDict()  # {template: None}, least recent first
+
+    def template(self, line):
+        # NUL never occurs in log lines, so masked runs cannot collide
+        # with literal text
+        return DIGIT_RUN_RE.sub(b"\0", line) if self.mask_digits else line
+
+    def is_idle(self, template):
+        if template in self.idle:
+            self.idle.move_to_end(template)
+            return True
+        return False
+
+    def learn_idle(self, template):
+        self.idle[template] = None
+        if len(self.idle) > self.max_size:
+            self.idle.popitem(last=False)
@@ -0,0 +1,102 @@
+from collections import namedtuple
+from trigger_matcher import TriggerMatcher
+from zone_registry import normalize_name
+
+# Event kinds published on the bus
+EVENT_LINE = "line"  # data: normalized log line (only read when subscribed)
+EVENT_TOON = "toon"  # data: (toon_name, log_path)
+EVENT_ZONE = "zone"  # data: zone entry name
+EVENT_SLAIN = "slain"  # data: mob name
+EVENT_VOICE = "voice"  # data: spoken message
+EVENT_OVERLAY = "overlay"  # data: {'message': str, 'duration': int}
+EVENT_TRIGGER_DISABLED = "trigger_disabled"  # data: (pattern, reason)
+
+# timestamp is the epoch time of the log line the event came from, toon
+# the character whose log it was read from and priority that of the trigger
+# behind an alert (events from one line are published highest first)
+LogEvent = namedtuple("LogEvent", ["kind", "data", "timestamp", "toon", "priority"],
+                      defaults=(0,))
+
+
+class LogBus:
+    """Routes events from the single log reader to interested consumers.
+
+    Subscribers and triggers live on the GUI thread but are read by the log
+    worker thread, so both are replaced wholesale instead of being mutated.
+    """
+
+    def __init__(self):
+        self.subscribers = {}  # {kind: (callback, ...)}
+        self.wanted = frozenset()
+        # ({kind: {toon: ((pattern_bytes, payload, zone, priority, exclusive), ...)}},
+        #  {(toon, zone_key): TriggerMatcher or None}); the matchers are
+        # compiled lazily on the worker thread and the pair is replaced as
+        # a whole whenever triggers change
+        self.trigger_state = ({}, {})
+        self.zone_aliases = {}  # {alias_key: zone_key}
+
+    def subscribe(self, kinds, callback):
+        subscribers = dict(self.subscribers)
+        for kind in kinds:
+            callbacks = subscribers.get(kind, ())
+            if callback not in callbacks:
+                subscribers[kind] = callbacks + (callback,)
+        self.subscribers = subscribers
+        self.wanted = frozenset(subscribers)
+
+    def unsubscribe(self, callback):
+        subscribers = {}
+        for kind, callbacks in self.subscribers.items():
+            callbacks = tuple(cb for cb in callbacks if cb != callback)
+            if callbacks:
+                subscribers[kind] = callbacks
+        self.subscribers = subscribers
+        self.wanted = frozenset(subscribers)
+
+    def set_triggers(self, kind, toon_triggers):
+        """Replace the triggers that produce `kind` events. A trigger's zone
+        is None for a global trigger; compiled matchers are kept for the
+        toons whose triggers did not change."""
+        old_triggers, matchers = self.trigger_state
+        triggers = dict(old_triggers)
+        if toon_triggers:
+            triggers[kind] = toon_triggers
+        else:
+            triggers.pop(kind, None)
+        old_by_toon = old_triggers.get(kind, {})
+        changed = {toon for toon in set(old_by_toon) | set(toon_triggers)
+                   if old_by_toon.get(toon) != toon_triggers.get(toon)}
+        matchers = {key: matcher for key, matcher in dict(matchers).items()
+                    if key[0] not in changed}
+        self.trigger_state = (triggers, matchers)
+
+    def set_zone_aliases(self, aliases):
+        """Map alternative zone names (e.g. /who names) to their zone."""
+        self.zone_aliases = {
+            normalize_name(alias): normalize_name(zone) for alias, zone in aliases.items()}
+
+    def zone_key(self, zone):
+        if not zone:
+            return None
+        zone = normalize_name(zone)
+        return self.zone_aliases.get(zone, zone)
+
+    def trigger_matcher(self, toon, zone):
+        """The matcher for the toon's global triggers plus those scoped to
+        `zone`, compiled on first use. Called on the worker thread."""
+        triggers, matchers = self.trigger_state
+        key = (toon, self.zone_key(zone))
+        if key not in matchers:
+            matcher = TriggerMatcher(
+                (pattern, kind, payload, priority, exclusive)
+                for kind, by_toon in triggers.items()
+                for pattern, payload, scope, priority, exclusive in by_toon.get(toon, ())
+                if scope is None or self.zone_key(scope) == key[1])
+            # An empty matcher is kept only to report disabled triggers
+            matchers[key] = matcher if matcher or matcher.disabled else None
+        return matchers[key]
+
+    def publish(self, events):
+        for event in events:
+            for callback in self.subscribers.get(event.kind, ()):
+                callback(event)
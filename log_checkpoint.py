@@ -0,0 +1,54 @@
+from PyQt6.QtCore import QSettings
+
+# Checkpoints are written to disk at most this often (seconds) while tailing
+CHECKPOINT_INTERVAL = 5
+
+
+class LogCheckpoints:
+    """Persisted read position of every log the worker has tailed.
+
+    Each entry records the log's path, inode, the offset just past the last
+    complete line handed out and a hash of the bytes before it, so a restart
+    can pick up exactly where the last run stopped and tell when the log was
+    truncated or replaced in the meantime.
+    """
+
+    def __init__(self, config_file):
+        self.settings = QSettings(config_file, QSettings.Format.IniFormat)
+        self.entries = {}  # {file_name: (path, inode, offset, tail_hash)}
+        self.dirty = set()
+        self.settings.beginGroup("checkpoints")
+        for name in self.settings.childGroups():
+            try:
+                self.entries[name] = (
+                    self.settings.value(f"{name}/path", "", type=str),
+                    int(self.settings.value(f"{name}/inode", "0", type=str)),
+                    int(self.settings.value(f"{name}/offset", "0", type=str)),
+                    int(self.settings.value(f"{name}/hash", "0", type=str)))
+            except ValueError:
+                print(f"Ignoring invalid log checkpoint for {name}")
+        self.settings.endGroup()
+
+    def get(self, file_name):
+        return self.entries.get(file_name)
+
+    def set(self, file_name, path, inode, offset, tail_hash):
+        entry = (path, inode, offset, tail_hash)
+        if self.entries.get(file_name) != entry:
+            self.entries[file_name] = entry
+            self.dirty.add(file_name)
+
+    def save(self):
+        if not self.dirty:
+            return
+        self.settings.beginGroup("checkpoints")
+        for name in self.dirty:
+            path, inode, offset, tail_hash = self.entries[name]
+            # Stored as strings: inodes and offsets can overflow a 32-bit int
+            self.settings.setValue(f"{name}/path", path)
+            self.settings.setValue(f"{name}/inode", str(inode))
+            self.settings.setValue(f"{name}/offset", str(offset))
+            self.settings.setValue(f"{name}/hash", str(tail_hash))
+        self.settings.endGroup()
+        self.settings.sync()
+        self.dirty.clear()
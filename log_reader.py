@@ -0,0 +1,190 @@
+import mmap
+import os
+import time
+import zlib
+
+# Backlogs are read in slices of this size so memory stays flat
+LOG_CHUNK_BYTES = 256 * 1024
+# A "line" longer than this without a newline is garbage and is dropped
+MAX_LINE_BYTES = 64 * 1024
+# A checkpoint's "last line" hash covers this many bytes before its offset
+TAIL_HASH_BYTES = 256
+
+
+def decode_line(data):
+    return data.decode("utf-8", errors="replace")
+
+
+MONTHS = {b"Jan": 1, b"Feb": 2, b"Mar": 3, b"Apr": 4, b"May": 5, b"Jun": 6,
+          b"Jul": 7, b"Aug": 8, b"Sep": 9, b"Oct": 10, b"Nov": 11, b"Dec": 12}
+
+
+def has_timestamp(line):
+    # Fixed width: "[Sun Oct 18 09:19:00 2026] " is always 27 bytes
+    return line[:1] == b"[" and line[25:27] == b"] "
+
+
+def strip_timestamp(line):
+    """Return the body of a raw log line without its "[...] " timestamp."""
+    if has_timestamp(line):
+        return line[27:].strip()
+    if line[:1] == b"[":
+        end = line.find(b"] ")
+        if end != -1:
+            return line[end + 2:].strip()
+    return line.strip()
+
+
+def reverse_search(file, needles, pattern, end, budget):
+    """Return the pattern.match() of the last line within the `budget`
+    bytes before offset `end` that contains one of the literal `needles`
+    and matches `pattern`, or None.
+
+    The file is memory-mapped and searched backward with rfind(), so
+    finding recent state at the end of a multi-GB log never reads the rest
+    of it.
+    """
+    if end <= 0 or budget <= 0:
+        return None
+    try:
+        mapped = mmap.mmap(file.fileno(), end, access=mmap.ACCESS_READ)
+    except (OSError, ValueError) as e:
+        print(f"Error mapping log file: {e}")
+        return None
+    try:
+        floor = max(0, end - budget)
+        # Latest occurrence of each needle still to be checked
+        found = {needle: mapped.rfind(needle, floor, end) for needle in needles}
+        while True:
+            needle = max(found, key=found.get)
+            pos = found[needle]
+            if pos == -1:
+                return None
+            # Lines are bounded like in LogReader, so a run of garbage is
+            # never walked
+            window = max(0, pos - MAX_LINE_BYTES)
+            line_start = mapped.rfind(b"\n", window, pos) + 1
+            if line_start or not window:
+                limit = min(end, pos + MAX_LINE_BYTES)
+                line_end = mapped.find(b"\n", pos, limit)
+                match = pattern.match(
+                    mapped[line_start:limit if line_end == -1 else line_end])
+                if match:
+                    return match
+            found[needle] = mapped.rfind(needle, floor, pos)
+    finally:
+        mapped.close()
+
+
+class TimestampParser:
+    """Fixed-width parser for eqlog timestamps.
+
+    Log lines arrive in bursts sharing the same minute, so the mktime()
+    result for the current "Sun Oct 18 09:19" prefix is cached and only the
+    seconds are added per line.
+    """
+
+    def __init__(self):
+        self.minute_key = None
+        self.minute_epoch = None
+
+    def parse(self, line):
+        """Return the epoch time of a raw "[Sun Oct 18 09:19:00 2026] ..."
+        line, or None if it has no valid timestamp."""
+        if not has_timestamp(line):
+            return None
+        try:
+            # Cache key covers "Oct 18 09:19" plus the year
+            minute_key = line[5:17] + line[21:25]
+            if minute_key != self.minute_key:
+                self.minute_epoch = time.mktime((
+                    int(line[21:25]), MONTHS[line[5:8]], int(line[9:11]),
+                    int(line[12:14]), int(line[15:17]), 0, 0, 0, -1))
+                self.minute_key = minute_key
+            return self.minute_epoch + int(line[18:20])
+        except (KeyError, ValueError, OverflowError):
+            return None
+
+
+class LogReader:
+    """Incremental binary reader for a growing eqlog file.
+
+    Tracks real byte offsets and holds back a half-written trailing line
+    until its newline arrives, so every line handed out is complete.
+    """
+
+    def __init__(self, path, offset=None):
+        self.path = path
+        self.file = open(path, "rb")
+        self.inode = os.fstat(self.file.fileno()).st_ino
+        if offset is None:
+            offset = self.file.seek(0, os.SEEK_END)
+        self.offset = offset  # bytes consumed, including the partial line
+        self.partial = b""
+        self.skipping = False  # Inside a dropped over-long line
+
+    @property
+    def line_offset(self):
+        """Byte offset just past the last complete line handed out."""
+        return self.offset - len(self.partial)
+
+    def read_chunks(self, chunk_size=LOG_CHUNK_BYTES):
+        """Yield the complete new lines (as bytes, without line endings) in
+        lists covering at most chunk_size bytes of the file each."""
+        self.file.seek(self.offset)
+        while True:
+            data = self.file.read(chunk_size)
+            if not data:
+                return
+            self.offset += len(data)
+            if self.skipping:
+                # The rest of the dropped line goes up to the next newline
+                end = data.find(b"\n")
+                if end < 0:
+                    continue
+                data = data[end + 1:]
+                self.skipping = False
+            if self.partial:
+                data = self.partial + data
+            lines = data.split(b"\n")
+            self.partial = lines.pop()
+            if len(self.partial) > MAX_LINE_BYTES:
+                self.partial = b""
+                self.skipping = True
+            if lines:
+                yield [line.rstrip(b"\r") for line in lines]
+
+    def tail_hash(self, offset):
+        """crc32 of the bytes just before offset, i.e. the end of the last
+        line read up to there."""
+        start = max(0, offset - TAIL_HASH_BYTES)
+        return zlib.crc32(os.pread(self.file.fileno(), offset - start, start))
+
+    def resume(self, inode, offset, tail_hash):
+        """Continue from a checkpoint taken by an earlier run. A log that was
+        replaced or truncated since then is read from the start instead."""
+        if not (inode == self.inode and offset <= self.offset and
+                self.tail_hash(offset) == tail_hash):
+            print(f"{self.path} changed since its checkpoint, reading from the start")
+            offset = 0
+        self.offset = offset
+        self.partial = b""
+        self.skipping = False
+
+    def check_rotation(self, size, inode):
+        """Start over when the file at path was truncated or replaced; returns
+        True if it was."""
+        if inode != self.inode:
+            self.file.close()
+            self.file = open(self.path, "rb")
+            self.inode = os.fstat(self.file.fileno()).st_ino
+        elif size >= self.offset:
+            return False
+        self.offset = 0
+        self.partial = b""
+        self.skipping = False
+        return True
+
+    def close(self):
+        if not self.file.closed:
+            self.file.close()
@@ -0,0 +1,143 @@
+import ctypes
+import ctypes.util
+import os
+import struct
+
+# inotify event masks (from <sys/inotify.h>)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+
+# One directory watch covers writes to every eqlog file plus creation,
+# deletion and renames, so switching toons needs no extra watches
+LOG_DIR_EVENTS = (IN_MODIFY | IN_CLOSE_WRITE | IN_CREATE | IN_MOVED_TO |
+                  IN_DELETE | IN_MOVED_FROM | IN_DELETE_SELF | IN_MOVE_SELF)
+
+_EVENT_HEADER = struct.Struct("iIII")  # wd, mask, cookie, len
+
+
+class Inotify:
+    """Minimal ctypes wrapper around the Linux inotify API."""
+
+    def __init__(self):
+        self._libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self.fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self.fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self.watches = {}  # {wd: path}
+
+    def fileno(self):
+        return self.fd
+
+    def add_watch(self, path, mask):
+        wd = self._libc.inotify_add_watch(self.fd, os.fsencode(path), mask)
+        if wd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno), path)
+        self.watches[wd] = path
+        return wd
+
+    def rm_watch(self, wd):
+        if self.watches.pop(wd, None) is not None:
+            self._libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self):
+        """Drain all pending events as (wd, mask, name) tuples."""
+        events = []
+        while True:
+            try:
+                data = os.read(self.fd, 64 * 1024)
+            except BlockingIOError:
+                break
+            if not data:
+                break
+            offset = 0
+            while offset < len(data):
+                wd, mask, _, length = _EVENT_HEADER.unpack_from(data, offset)
+                offset += _EVENT_HEADER.size
+                name = data[offset:offset + length].rstrip(b"\0")
+                offset += length
+                if mask & IN_IGNORED:
+                    self.watches.pop(wd, None)
+                events.append((wd, mask, os.fsdecode(name)))
+        return events
+
+    def close(self):
+        if self.fd >= 0:
+            os.close(self.fd)
+            self.fd = -1
+            self.watches.clear()
+
+
+def create_inotify():
+    """Return an Inotify instance, or None when inotify is unavailable."""
+    try:
+        return Inotify()
+    except (OSError, AttributeError, TypeError) as e:
+        print(f"inotify unavailable, falling back to polling: {e}")
+        return None
+
+
+class LogDirIndex:
+    """In-memory index of the eqlog files in a log directory.
+
+    The directory is listed once; after that single entries are refreshed
+    as inotify reports them, so finding the newest log is O(1) per event
+    instead of a full listdir/stat pass.
+    """
+
+    def __init__(self, log_dir):
+        self.log_dir = log_dir
+        self.files = {}  # {file_name: (size, mtime, inode)}
+        # Size of each log before its latest change (0 for a new log), where
+        # reading should start when a log is only picked up after the change
+        self.previous_sizes = {}
+        self.latest = None
+
+    def scan(self):
+        files = {}
+        try:
+            with os.scandir(self.log_dir) as entries:
+                for entry in entries:
+                    if entry.name.startswith("eqlog_"):
+                        try:
+                            stat = entry.stat()
+                        except OSError:
+                            continue
+                        files[entry.name] = (
+                            stat.st_size, stat.st_mtime, stat.st_ino)
+        except OSError as e:
+            print(f"Error scanning log directory: {e}")
+        self.previous_sizes = {name: self.files.get(name, (0,))[0] for name in files}
+        self.files = files
+        self.latest = max(files, key=lambda f: files[f][1], default=None)
+
+    def update(self, file_name):
+        """Refresh one entry after a change; returns False if it is gone."""
+        try:
+            stat = os.stat(os.path.join(self.log_dir, file_name))
+        except OSError:
+            if self.files.pop(file_name, None) is not None and file_name == self.latest:
+                self.latest = max(
+                    self.files, key=lambda f: self.files[f][1], default=None)
+            return False
+        self.previous_sizes[file_name] = self.files.get(file_name, (0,))[0]
+        self.files[file_name] = (stat.st_size, stat.st_mtime, stat.st_ino)
+        if self.latest is None or stat.st_mtime >= self.files[self.latest][1]:
+            self.latest = file_name
+        return True
+
+    def previous_size(self, file_name):
+        return self.previous_sizes.get(file_name, 0)
+
+    def mtime(self, file_name):
+        entry = self.files.get(file_name)
+        return entry[1] if entry else None
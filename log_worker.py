@@ -0,0 +1,473 @@
+import os
+import re
+import select
+import time
+from PyQt6.QtCore import QThread, pyqtSignal
+from log_bus import (LogEvent, EVENT_LINE, EVENT_TOON, EVENT_ZONE, EVENT_SLAIN,
+                     EVENT_TRIGGER_DISABLED)
+from log_checkpoint import LogCheckpoints, CHECKPOINT_INTERVAL
+from log_reader import (LogReader, TimestampParser, strip_timestamp, decode_line,
+                        reverse_search)
+from line_parser import LineClassifier, LineShapeCache, WhoZone, MobSlain
+from log_watcher import (create_inotify, LogDirIndex, LOG_DIR_EVENTS,
+                         IN_DELETE_SELF, IN_MOVE_SELF, IN_IGNORED, IN_Q_OVERFLOW)
+
+# Adaptive polling bounds used when inotify is unavailable (in milliseconds)
+LOG_POLL_MIN_MS = 50
+LOG_POLL_MAX_MS = 1000
+# While the log directory cannot be watched (it is missing), watching it is
+# retried this often (in milliseconds)
+LOG_DIR_RETRY_MS = 1000
+# Matched events are coalesced and handed to the GUI at most this often
+FLUSH_INTERVAL = 1 / 30
+# Pending events are flushed early past this size to keep memory bounded
+MAX_PENDING_EVENTS = 1000
+# Another log must be written while the active one has been quiet this long
+# (seconds) before the worker switches toons, so two boxed clients writing
+# at once do not flap back and forth
+ACTIVE_LOG_GRACE = 5
+# Without inotify the whole directory is rescanned at most this often (seconds)
+DIR_RESCAN_INTERVAL = 3
+# In multi-toon mode, logs written within this many seconds are tailed
+MULTI_TOON_WINDOW = 600
+
+# A full zone-entry or /who line, for finding the last zone in a log, and
+# literal needles for locating candidates
+ZONE_STATE_RE = re.compile(
+    rb"\[[^\]]*\] (?:You have entered (.+?)\.|"
+    rb"There (?:is 1 player|are \d+ players) in (.+?)\.)")
+ZONE_STATE_NEEDLES = (b"] You have entered ", b"] There is 1 player in ",
+                      b"] There are ")
+
+
+def toon_from_log(file_name):
+    # eqlog_<toon>_<server>.txt
+    return file_name.split("_")[1]
+
+
+class LogIngestWorker(QThread):
+    """The single reader of the eqlog files, running off the GUI thread.
+
+    Normally only the active (most recently written) log is tailed. In
+    multi-toon mode every log written in the last MULTI_TOON_WINDOW seconds
+    is tailed at once, all multiplexed on this thread and one inotify watch.
+    Lines are normalized, parsed and matched here; only the LogEvents that
+    some bus subscriber wants are handed to the GUI thread, batched through
+    events_ready.
+    """
+    events_ready = pyqtSignal(list)
+
+    def __init__(self, log_dir, bus, zones, watch_mode="auto", catchup_max_age=30, multi_toon=False,
+                 checkpoint_file=None, resume_logs=True, zone_scan_bytes=16 * 1024 * 1024,
+                 line_cache_size=4096):
+        super().__init__()
+        self.log_dir = log_dir
+        self.bus = bus
+        self.zones = zones  # ZoneRegistry
+        self.watch_mode = watch_mode
+        # Trigger alerts from lines older than this many seconds are dropped
+        # (zone and kill events still apply); 0 keeps every alert
+        self.catchup_max_age = catchup_max_age
+        self.multi_toon = multi_toon
+        # Read positions are checkpointed to checkpoint_file; with resume_logs
+        # a log reopened later (e.g. after a restart) continues from its
+        # checkpoint through the catch-up path instead of from EOF
+        self.checkpoint_file = checkpoint_file
+        self.resume_logs = resume_logs
+        # How far back from the read position to look for the zone a newly
+        # opened log was last in; 0 disables the scan
+        self.zone_scan_bytes = zone_scan_bytes
+        self.checkpoints = None
+        self.last_checkpoint = 0.0
+        self.readers = {}  # {file_name: LogReader}
+        self.unread = set()  # opened logs that may already have a backlog
+        self.log_path = None  # most recently opened log
+        self.timestamps = TimestampParser()
+        self.classifier = LineClassifier()
+        # Per-toon caches of line templates that match nothing, rebuilt with
+        # the toon's trigger matcher (so also on zone changes); 0 disables them
+        self.line_cache_size = line_cache_size
+        self.shape_caches = {}  # {toon: (TriggerMatcher, LineShapeCache)}
+        # Last zone seen per toon, which selects its zone-scoped triggers
+        self.toon_zones = {}  # {toon: zone_name}
+        self.lines_routed = 0
+        self.lines_skipped = 0
+        self.pending = []
+        self.last_flush = 0.0
+        self._new_log_dir = None
+        self._running = True
+        self._wake_r, self._wake_w = os.pipe()
+        os.set_blocking(self._wake_r, False)
+        self.inotify = None
+        self.log_dir_watch = None
+        self.index = LogDirIndex(log_dir)
+        self.last_rescan = 0.0
+        # Logs without a checkpoint are opened at EOF when first found (at
+        # startup or in a new log directory); a log picked up later is read
+        # from where it was before the write that activated it
+        self.open_at_end = True
+
+    def set_log_dir(self, log_dir):
+        self._new_log_dir = log_dir
+        self.wake()
+
+    def set_multi_toon(self, enabled):
+        self.multi_toon = enabled
+        self.wake()
+
+    def wake(self):
+        os.write(self._wake_w, b"\0")
+
+    def stop(self):
+        self._running = False
+        self.wake()
+        self.wait()
+
+    def run(self):
+        if self.watch_mode != "poll":
+            self.inotify = create_inotify()
+        poller = select.poll()
+        poller.register(self._wake_r, select.POLLIN)
+        if self.inotify:
+            poller.register(self.inotify.fileno(), select.POLLIN)
+        if self.checkpoint_file:
+            self.checkpoints = LogCheckpoints(self.checkpoint_file)
+        self.watch_log_dir()
+        self.index.scan()
+        self.check_active_logs(None)
+        self.open_at_end = False
+        poll_interval = LOG_POLL_MIN_MS
+        while self._running:
+            timeout = None if self.inotify else poll_interval
+            if self.inotify and self.log_dir_watch is None:
+                timeout = LOG_DIR_RETRY_MS
+            if self.pending:
+                flush_in = max(0, int((self.last_flush + FLUSH_INTERVAL - time.monotonic()) * 1000))
+                timeout = flush_in if timeout is None else min(timeout, flush_in)
+            switch_in = self.switch_check_in()
+            if switch_in is not None:
+                timeout = switch_in if timeout is None else min(timeout, switch_in)
+            ready = [fd for fd, _ in poller.poll(timeout)]
+            # Names of the logs that may have new data; None means any of them
+            changed = set()
+            if self._wake_r in ready:
+                try:
+                    os.read(self._wake_r, 4096)
+                except BlockingIOError:
+                    pass
+                changed = None
+                # Rotation checks below compare against the index
+                for name in self.readers:
+                    self.index.update(name)
+            if self._new_log_dir is not None:
+                self.log_dir, self._new_log_dir = self._new_log_dir, None
+                self.close_log_file()
+                self.index = LogDirIndex(self.log_dir)
+                self.watch_log_dir()
+                self.index.scan()
+                self.open_at_end = True
+            if self.inotify and self.inotify.fileno() in ready:
+                names = self.handle_inotify_events()
+                if changed is not None:
+                    changed = names
+            elif not self.inotify:
+                self.poll_log_dir()
+                changed = None
+            if self.inotify and self.log_dir_watch is None and self.watch_log_dir(retry=True):
+                # The log directory is back: treat it as a new one
+                self.index.scan()
+                self.open_at_end = True
+                changed = None
+            self.check_active_logs(changed)
+            self.open_at_end = False
+            if self.read_new_lines(changed):
+                poll_interval = LOG_POLL_MIN_MS
+            else:
+                poll_interval = min(poll_interval * 2, LOG_POLL_MAX_MS)
+            self.flush()
+            self.save_checkpoints()
+        self.flush(force=True)
+        self.save_checkpoints(force=True)
+        self.close_log_file()
+        if self.inotify:
+            self.inotify.close()
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+
+    def handle_inotify_events(self):
+        changed = set()
+        overflowed = False
+        for wd, mask, name in self.inotify.read_events():
+            if mask & IN_Q_OVERFLOW:
+                # Events were dropped, so any log may have changed
+                overflowed = True
+                continue
+            if wd != self.log_dir_watch:
+                continue
+            if mask & (IN_DELETE_SELF | IN_MOVE_SELF | IN_IGNORED):
+                # The log directory itself went away; it is watched again
+                # (by path) once it is back
+                self.inotify.rm_watch(wd)
+                self.log_dir_watch = None
+                self.index.scan()
+                self.close_log_file()
+            elif name.startswith("eqlog_"):
+                changed.add(name)
+        if overflowed:
+            self.index.scan()
+            return None
+        for name in changed:
+            self.index.update(name)
+        return changed
+
+    def poll_log_dir(self):
+        # Fallback: stat the tailed logs every tick, rescan the directory
+        # only occasionally
+        now = time.monotonic()
+        if now - self.last_rescan >= DIR_RESCAN_INTERVAL:
+            self.last_rescan = now
+            self.index.scan()
+        else:
+            for name in list(self.readers):
+                self.index.update(name)
+
+    def switch_check_in(self):
+        """Milliseconds until a newer log becomes eligible as the active one."""
+        latest = self.index.latest
+        if self.multi_toon or not self.readers or not latest or latest == self.log_path:
+            return None
+        active_mtime = self.index.mtime(self.log_path)
+        if active_mtime is None:
+            return 0
+        return max(0, int((active_mtime + ACTIVE_LOG_GRACE - time.time()) * 1000))
+
+    def check_active_logs(self, changed):
+        """Open/close readers; `changed` limits which new logs are considered."""
+        if self.multi_toon:
+            cutoff = time.time() - MULTI_TOON_WINDOW
+            candidates = self.index.files if changed is None else changed
+            for name in candidates:
+                mtime = self.index.mtime(name)
+                if name not in self.readers and mtime is not None and mtime >= cutoff:
+                    self.open_log_file(name)
+            for name in list(self.readers):
+                mtime = self.index.mtime(name)
+                if mtime is None or mtime < cutoff:
+                    self.close_log_file(name)
+            return
+        latest = self.index.latest
+        if latest is None:
+            self.close_log_file()
+            return
+        if latest != self.log_path and self.switch_check_in() in (None, 0):
+            self.close_log_file()
+            self.open_log_file(latest)
+        # Leaving multi-toon mode drops every log but the active one
+        for name in list(self.readers):
+            if name != self.log_path:
+                self.close_log_file(name)
+
+    def watch_log_dir(self, retry=False):
+        """Watch the log directory; returns whether it is watched. Failed
+        retries are not reported again."""
+        if not self.inotify:
+            return False
+        if self.log_dir_watch is not None:
+            self.inotify.rm_watch(self.log_dir_watch)
+            self.log_dir_watch = None
+        try:
+            self.log_dir_watch = self.inotify.add_watch(
+                self.log_dir, LOG_DIR_EVENTS)
+        except OSError as e:
+            if not retry:
+                print(f"Error watching log directory: {e}")
+            return False
+        return True
+
+    def close_log_file(self, file_name=None):
+        """Stop tailing one log, or every log when no name is given."""
+        names = list(self.readers) if file_name is None else [file_name]
+        for name in names:
+            reader = self.readers.pop(name, None)
+            self.unread.discard(name)
+            if reader:
+                self.checkpoint_reader(name, reader)
+                reader.close()
+        if self.log_path not in self.readers:
+            self.log_path = None
+
+    def open_log_file(self, file_name):
+        path = os.path.join(self.log_dir, file_name)
+        try:
+            reader = LogReader(path)
+            checkpoint = self.checkpoints and self.checkpoints.get(file_name)
+            if self.resume_logs and checkpoint and checkpoint[0] == path:
+                reader.resume(*checkpoint[1:])
+            elif not self.open_at_end:
+                # Keep the lines whose write made this log active
+                reader.offset = min(self.index.previous_size(file_name), reader.offset)
+        except OSError as e:
+            print(f"Error opening log file: {e}")
+            return False
+        self.readers[file_name] = reader
+        self.unread.add(file_name)
+        self.log_path = file_name
+        toon = toon_from_log(file_name)
+        self.pending.append(LogEvent(
+            EVENT_TOON, (toon, file_name), time.time(), toon))
+        self.recover_zone(reader, toon)
+        return True
+
+    def recover_zone(self, reader, toon):
+        """Publish the zone the toon was last seen in, scanning the log
+        backward from the read position instead of waiting for a new
+        zone-entry or /who line."""
+        if not self.zone_scan_bytes:
+            return
+        match = reverse_search(reader.file, ZONE_STATE_NEEDLES, ZONE_STATE_RE,
+                               reader.line_offset, self.zone_scan_bytes)
+        if not match:
+            return
+        zone_name = self.zone_name(match.group(1) or match.group(2))
+        timestamp = self.timestamps.parse(match.group(0)) or time.time()
+        self.toon_zones[toon] = zone_name
+        if EVENT_ZONE in self.bus.wanted:
+            self.pending.append(LogEvent(EVENT_ZONE, zone_name, timestamp, toon))
+
+    def builtin_event(self, parsed):
+        """Map a classified line to its (kind, data) bus event."""
+        if isinstance(parsed, MobSlain):
+            return EVENT_SLAIN, decode_line(parsed.mob.strip())
+        if isinstance(parsed, WhoZone):
+            return EVENT_ZONE, self.zone_name(parsed.who_name)
+        return EVENT_ZONE, self.zone_name(parsed.zone)
+
+    def zone_name(self, name):
+        # Entry and /who names (and their spellings) all map to the entry name
+        return self.zones.canonical(decode_line(name))
+
+    def read_new_lines(self, changed=None):
+        read_any = False
+        for name, reader in list(self.readers.items()):
+            if changed is not None and name not in changed and name not in self.unread:
+                continue
+            self.unread.discard(name)
+            toon = toon_from_log(name)
+            entry = self.index.files.get(name)
+            try:
+                if entry and reader.check_rotation(entry[0], entry[2]):
+                    print(f"{name} was truncated or replaced, reading from the start")
+                for lines in reader.read_chunks():
+                    read_any = True
+                    for line in lines:
+                        self.process_line(line, toon)
+                    self.flush(force=len(self.pending) >= MAX_PENDING_EVENTS)
+                    # Stay responsive to stop/log dir changes mid-backlog
+                    if not self._running or self._new_log_dir is not None:
+                        return read_any
+            except OSError as e:
+                print(f"Error reading log lines: {e}")
+                self.close_log_file(name)
+        return read_any
+
+    def checkpoint_reader(self, name, reader):
+        if not self.checkpoints:
+            return
+        offset = reader.line_offset
+        try:
+            tail_hash = reader.tail_hash(offset)
+        except (OSError, ValueError):
+            return
+        self.checkpoints.set(name, reader.path, reader.inode, offset, tail_hash)
+
+    def save_checkpoints(self, force=False):
+        # Only checkpoint once every event read so far has been handed out
+        if not self.checkpoints or (self.pending and not force):
+            return
+        now = time.monotonic()
+        if not force and now - self.last_checkpoint < CHECKPOINT_INTERVAL:
+            return
+        self.last_checkpoint = now
+        for name, reader in self.readers.items():
+            self.checkpoint_reader(name, reader)
+        self.checkpoints.save()
+
+    def process_line(self, raw_line, toon):
+        # Lines stay raw bytes; only lines that produce an event are decoded
+        # and have their timestamp parsed
+        line = strip_timestamp(raw_line)
+        if not line:
+            return
+        wanted = self.bus.wanted
+        matcher = self.bus.trigger_matcher(toon, self.toon_zones.get(toon))
+        events = []
+        shapes = None
+        if EVENT_LINE in wanted:
+            events.append((EVENT_LINE, decode_line(line)))
+        elif self.line_cache_size:
+            shapes = self.shape_cache(toon, matcher)
+            template = shapes.template(line)
+            self.lines_routed += 1
+        if shapes and shapes.is_idle(template):
+            # Known to match nothing; only regexes without a literal to
+            # prefilter on still need to see the line
+            self.lines_skipped += 1
+            if not (matcher and matcher.unfiltered):
+                return
+            parsed = found = None
+        else:
+            # Built-in events (zone entry, /who, kills) in one classifier pass
+            parsed = self.classifier.classify(line)
+            found = matcher.scan(line) if matcher else None
+            if shapes and not parsed and not found:
+                shapes.learn_idle(template)
+        if parsed:
+            event = self.builtin_event(parsed)
+            if event[0] == EVENT_ZONE:
+                # The next line is matched against the new zone's triggers
+                self.toon_zones[toon] = event[1]
+            if event[0] in wanted:
+                events.append(event)
+        alerts = []
+        if matcher:
+            # Every trigger the line matched, already in priority order
+            for kind, data, priority, _ in matcher.matches(line, found):
+                if kind in wanted:
+                    alerts.append((kind, data, priority))
+        if matcher is not None and matcher.disabled:
+            # Unsafe or too slow regex triggers, reported as state events
+            if EVENT_TRIGGER_DISABLED in wanted:
+                events.extend((EVENT_TRIGGER_DISABLED, (pattern.decode(), reason))
+                              for pattern, reason in matcher.disabled)
+            matcher.disabled = []
+        if not events and not alerts:
+            return
+        now = time.time()
+        timestamp = self.timestamps.parse(raw_line) or now
+        # Catch-up policy: stale alerts are dropped, state events still apply
+        for kind, data in events:
+            self.pending.append(LogEvent(kind, data, timestamp, toon))
+        if alerts and not (self.catchup_max_age and now - timestamp > self.catchup_max_age):
+            for kind, data, priority in alerts:
+                self.pending.append(LogEvent(kind, data, timestamp, toon, priority))
+
+    def shape_cache(self, toon, matcher):
+        cached = self.shape_caches.get(toon)
+        if cached is None or cached[0] is not matcher:
+            cached = self.shape_caches[toon] = (matcher, LineShapeCache(
+                self.line_cache_size, not (matcher and matcher.digit_sensitive)))
+        return cached[1]
+
+    def line_cache_stats(self):
+        """(lines routed, lines skipped, templates cached), read from the GUI."""
+        templates = sum(len(cache.idle) for _, cache in list(self.shape_caches.values()))
+        return self.lines_routed, self.lines_skipped, templates
+
+    def flush(self, force=False):
+        if not self.pending:
+            return
+        now = time.monotonic()
+        if force or now - self.last_flush >= FLUSH_INTERVAL:
+            events, self.pending = self.pending, []
+            self.last_flush = now
+            self.events_ready.emit(events)
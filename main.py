@@ -1,13 +1,18 @@
 import time
 import pygame
 from gtts import gTTS
-import re
 import os
 import importlib
-from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QFileDialog
+from PyQt6.QtWidgets import QApplication, QSystemTrayIcon, QMenu, QFileDialog, QMessageBox
 from PyQt6.QtGui import QIcon, QAction
-from PyQt6.QtCore import QSettings, QTimer, QThread, pyqtSignal
+from PyQt6.QtCore import QSettings
 from timer_app import MobTimerApp
+from timer_scheduler import TimerScheduler
+from log_bus import LogBus, EVENT_SLAIN, EVENT_TOON, EVENT_ZONE
+from kill_history import KillHistory
+from session_snapshot import SessionSnapshot
+from zone_registry import ZONES
+from log_worker import LogIngestWorker
 import voice_notifications_app
 import overlays_app
 importlib.reload(overlays_app)
@@ -17,173 +22,6 @@ OverlaysApp = overlays_app.OverlaysApp
 importlib.reload(voice_notifications_app)
 VoiceNotificationsApp = voice_notifications_app.VoiceNotificationsApp
 
-# Zone timers from Project 1999 Wiki (in seconds)
-# Maps both zone entry names (e.g., "Northern Plains of Karana") and /who names (e.g., "Northern Karana")
-ZONE_TIMERS = {
-    "The Arena": 400, "Arena": 400,  # Default 6:40 (N/A, no NPCs)
-    "Beholder's Maze": 360, "Gorge of King Xorbb": 360,  # 6:00
-    "East Commonlands": 400, "Eastern Commonlands": 400,  # 6:40
-    "Eastern Plains of Karana": 400, "Eastern Karana": 400,  # 6:40
-    "Erud's Crossing": 400,  # 6:40 (same for both)
-    "Everfrost Peaks": 400, "Everfrost": 400,  # 6:40
-    "Highpass Hold": 300, "High Hold": 300,  # 5:00 (first listed)
-    "Innothule Swamp": 400, "Innothule": 400,  # 6:40
-    "Kithicor Forest": 400, "Kithicor": 400,  # 6:40
-    "Lake Rathetear": 400, "Rathetear": 400,  # 6:40
-    "Misty Thicket": 400,  # 6:40 (same for both)
-    "Nektulos Forest": 400, "Nektulos": 400,  # 6:40
-    "Northern Desert of Ro": 400, "North Ro": 400,  # 6:40
-    "Northern Plains of Karana": 400, "Northern Karana": 400,  # 6:40
-    "Oasis of Marr": 990, "Oasis": 990,  # 16:30
-    "Ocean of Tears": 360,  # 6:00 (same for both)
-    "Qeynos Hills": 400, "Qeynos Hills": 400,  # 6:40
-    "Rathe Mountains": 400, "Rathe Mtns": 400,  # 6:40
-    "Southern Desert of Ro": 400, "South Ro": 400,  # 6:40
-    "Southern Karana": 360,  # 6:00 (same for both)
-    "The Feerrott": 400, "Feerrott": 400,  # 6:40
-    "West Commonlands": 400, "Western Commonlands": 400,  # 6:40
-    "Western Plains of Karana": 400, "Western Karana": 400,  # 6:40
-    "Grobb": 1440,  # 24:00 (same for both)
-    "Halas": 1440,  # 24:00 (same for both)
-    "Neriak": 1440,  # 24:00 (same for both)
-    "Freeport": 1440,  # 24:00 (same for both)
-    "Qeynos": 400,  # 6:40 (same for both)
-    "Oggok": 1440,  # 24:00 (same for both)
-    "Rivervale": 1320,  # 22:00 (same for both)
-    "Surefall Glade": 400,  # 6:40 (same for both)
-    "Befallen": 1140,  # 19:00 (same for both)
-    "Blackburrow": 1320,  # 22:00 (same for both)
-    "Cazic Thule": 1320,  # 22:00 (same for both)
-    "Clan Runnyeye": 1320, "Runnyeye": 1320,  # 22:00
-    "High Keep": 600,  # 10:00 (Goblins, first listed)
-    "Lower Guk": 1680,  # 28:00 (same for both)
-    "Nagafen's Lair": 1320, "Solusek B": 1320,  # 22:00
-    "Najena": 1110,  # 18:30 (same for both)
-    "Permafrost": 1320,  # 22:00 (same for both)
-    "Qeynos Catacombs": 720, "Qeynos Sewers": 720,  # 12:00 (first listed)
-    "Solusek's Eye": 1080, "Solusek A": 1080,  # 18:00
-    "Splitpaw Lair": 1320, "Splitpaw": 1320,  # 22:00 (Gnolls, first listed)
-    "The Temple of Solusek Ro": 300, "Solusek Ro": 300,  # 5:00
-    "Upper Guk": 990,  # 16:30 (same for both)
-    "Erudin": 400,  # 6:40 (Sharks)
-    "Erudin Palace": 1500,  # 25:00 (same for both)
-    "Paineel": 630,  # 10:30 (same for both)
-    "Kerra Island": 1065, "Kerra Isle": 1065,  # 17:45
-    "Toxxulia Forest": 400, "Toxxulia": 400,  # 6:40
-    "The Hole": 1290,  # 21:30 (same for both)
-    "Stonebrunt Mountains": 670, "Stonebrunt": 670,  # 11:10
-    "The Warrens": 400, "Warrens": 400,  # 6:40
-    "Ak'Anon": 400, "Ak`Anon": 400,  # 6:40
-    "Felwithe": 1440,  # 24:00 (same for both)
-    "Kaladim": 400,  # 6:40 (same for both)
-    "Kelethin": 400, "Greater Faydark": 400,  # Default 6:40 (MM:SS)
-    "Butcherblock Mountains": 600, "Butcherblock": 600,  # 10:00 (first listed)
-    "Dagnor's Cauldron": 400,  # Default 6:40 (MM:SS)
-    "Greater Faydark": 425,  # 7:05
-    "Lesser Faydark": 390,  # 6:30 (same for both)
-    "Steamfont Mountains": 400, "Steamfont": 400,  # 6:40
-    "Crushbone": 540,  # 9:00 (same for both)
-    "Kedge Keep": 1320, "Kedge": 1320,  # 22:00
-    "Mistmoore Castle": 1320, "Mistmoore": 1320,  # 22:00
-    "The Estate of Unrest": 1320, "Unrest": 1320,  # 22:00
-    "Burning Wood": 400, "Burning Woods": 400,  # 6:40
-    "Dreadlands": 400,  # 6:40 (same for both)
-    "Emerald Jungle": 400,  # Default 6:40 (MM:SS)
-    "Field of Bone": 400,  # 6:40 (same for both)
-    "Firiona Vie": 400,  # 6:40 (same for both)
-    "Frontier Mountains": 400,  # 6:40 (same for both)
-    "Lake of Ill Omen": 400,  # 6:40 (same for both)
-    "The Overthere": 400, "Overthere": 400,  # 6:40
-    "Skyfire Mountains": 780, "Skyfire": 780,  # 13:00
-    "Swamp of No Hope": 400,  # 6:40 (same for both)
-    "Timorous Deep": 720,  # 12:00 (same for both)
-    "Trakanon's Teeth": 400,  # 6:40 (same for both)
-    "Warsliks Woods": 400,  # 6:40 (same for both)
-    "Cabilis": 400,  # 6:40 (same for both)
-    "Chardok": 1080,  # 18:00 (same for both)
-    "City of Mist": 1320,  # 22:00 (same for both)
-    "Dalnir": 720,  # 12:00 (same for both)
-    "Howling Stones": 1230, "Charasis": 1230,  # 20:30
-    "Kaesora": 1080,  # 18:00 (same for both)
-    "Karnor's Castle": 1620, "Karnor": 1620,  # 27:00
-    "Kurn's Tower": 1100, "Kurn": 1100,  # 18:20
-    "Mines of Nurga": 1230, "Nurga": 1230,  # 20:30
-    "Old Sebilis": 1620, "Sebilis": 1620,  # 27:00
-    "Temple of Droga": 1230, "Droga": 1230,  # 20:30
-    "Veeshan's Peak": 400,  # Default 6:40 (MM:SS)
-    "Cobalt Scar": 1200,  # 20:00 (same for both)
-    "Eastern Wastes": 400,  # 6:40 (same for both)
-    "The Great Divide": 640, "Great Divide": 640,  # 10:40
-    "Iceclad Ocean": 400, "Iceclad": 400,  # 6:40
-    "Wakening Land": 400,  # 6:40 (first listed)
-    "Western Wastes": 400,  # Default 6:40 (MM:SS)
-    "Icewell Keep": 1260,  # 21:00 (same for both)
-    "Kael Drakkal": 1680, "Kael": 1680,  # 28:00
-    "Skyshrine": 1800,  # 30:00 (same for both)
-    "Thurgadin": 420,  # 7:00 (same for both)
-    "Crystal Caverns": 885,  # 14:45 (same for both)
-    "Dragon Necropolis": 1620,  # 27:00 (same for both)
-    "Siren's Grotto": 1680, "Sirens": 1680,  # 28:00
-    "Sleeper's Tomb": 28800,  # 8:00:00 (same for both)
-    "Temple of Veeshan": 43200,  # 72:00 (same for both)
-    "Tower of Frozen Shadow": 1200, "Frozen Shadow": 1200,  # 20:00
-    "Velketor's Labyrinth": 1970, "Velketor": 1970,  # 32:50
-    "Plane of Fear": 28800,  # 8:00:00 (same for both)
-    "Plane of Hate": 28800,  # 8:00:00 (same for both)
-    "Plane of Sky": 28800,  # 8:00:00 (same for both)
-    "Plane of Growth": 43200,  # 12:00:00 (same for both)
-    "Plane of Mischief": 4210  # 01:10:10 (same for both)
-}
-
-# Map /who names to zone entry names for consistency
-WHO_TO_ZONE = {
-    "Northern Karana": "Northern Plains of Karana",
-    "Eastern Karana": "Eastern Plains of Karana",
-    "Western Karana": "Western Plains of Karana",
-    "Eastern Commonlands": "East Commonlands",
-    "Western Commonlands": "West Commonlands",
-    "Gorge of King Xorbb": "Beholder's Maze",
-    "High Hold": "Highpass Hold",
-    "Innothule": "Innothule Swamp",
-    "Kithicor": "Kithicor Forest",
-    "Rathetear": "Lake Rathetear",
-    "North Ro": "Northern Desert of Ro",
-    "South Ro": "Southern Desert of Ro",
-    "Feerrott": "The Feerrott",
-    "Everfrost": "Everfrost Peaks",
-    "Oasis": "Oasis of Marr",
-    "Runnyeye": "Clan Runnyeye",
-    "Solusek B": "Nagafen's Lair",
-    "Solusek A": "Solusek's Eye",
-    "Splitpaw": "Splitpaw Lair",
-    "Solusek Ro": "The Temple of Solusek Ro",
-    "Qeynos Sewers": "Qeynos Catacombs",
-    "Kerra Isle": "Kerra Island",
-    "Toxxulia": "Toxxulia Forest",
-    "Warrens": "The Warrens",
-    "Ak`Anon": "Ak'Anon",
-    "Greater Faydark": "Kelethin",
-    "Butcherblock": "Butcherblock Mountains",
-    "Kedge": "Kedge Keep",
-    "Mistmoore": "Mistmoore Castle",
-    "Unrest": "The Estate of Unrest",
-    "Burning Woods": "Burning Wood",
-    "Overthere": "The Overthere",
-    "Skyfire": "Skyfire Mountains",
-    "Charasis": "Howling Stones",
-    "Karnor": "Karnor's Castle",
-    "Kurn": "Kurn's Tower",
-    "Nurga": "Mines of Nurga",
-    "Sebilis": "Old Sebilis",
-    "Droga": "Temple of Droga",
-    "Great Divide": "The Great Divide",
-    "Iceclad": "Iceclad Ocean",
-    "Kael": "Kael Drakkal",
-    "Sirens": "Siren's Grotto",
-    "Frozen Shadow": "Tower of Frozen Shadow",
-    "Velketor": "Velketor's Labyrinth"
-}
-
 
 class MainApp:
     def __init__(self):
@@ -199,16 +37,28 @@ class MainApp:
         self.log_dir = self.settings.value(
             "General/log_dir", os.getenv("LOG_DIR", "/app/logs"), type=str)
         self.log_path = None
-        self.log_file = None
-        self.log_position = 0
         self.toon_name = "Unknown"
         self.current_zone = "Unknown"
         self.zone_timer = 400  # Default 6:40
+        self.toon_zones = {}  # {toon_name: (zone, zone_timer)} for every tailed log
+        # Multi-toon mode tails every recently active log instead of just
+        # the newest one
+        self.multi_toon = self.settings.value(
+            "General/multi_toon", False, type=bool)
         self.timer_window = None
+        # Respawn times learned from every kill read, open window or not
+        self.kill_history = KillHistory(os.path.join(config_dir, "kill-history.db"))
         self.voice_window = None
         self.overlays_window = None
-        self.overlays_window = OverlaysApp(self.log_dir, self.toon_name)
-        self.load_active_log_file()
+        # One deadline heap drives every mob timer and overlay bar
+        self.timer_scheduler = TimerScheduler()
+        self.overlays_window = OverlaysApp(
+            self.log_dir, self.toon_name, self.timer_scheduler)
+        # Timers, bars and zones survive a restart through the session snapshot
+        self.session = SessionSnapshot(
+            os.path.join(config_dir, "session.json"), self.snapshot_session)
+        self.restore_session(self.session.load())
+        self.overlays_window.overlay_manager.bars_changed.connect(self.session.mark_dirty)
         icon_path = os.path.abspath(os.path.join(
             os.path.dirname(__file__), "./images/tray-icon.png"))
         icon = QIcon(icon_path)
@@ -219,99 +69,60 @@ class MainApp:
         self.menu = QMenu()
         self.setup_menu()
         self.tray.setContextMenu(self.menu)
-        self.log_poll_timer = QTimer()
-        self.log_poll_timer.timeout.connect(self.update_log_position)
-        self.log_poll_timer.start(1000)
-        self.overlays_window.update_log_info(
-            self.log_file, self.log_path, self.log_position, self.toon_name)
+        # "auto" uses inotify when available, "poll" forces the polling fallback
+        # (e.g. for bind mounts that never deliver inotify events)
+        log_watch_mode = self.settings.value(
+            "General/log_watch", os.getenv("LOG_WATCH", "auto"), type=str)
+        # The worker is the only log reader; everything else subscribes to
+        # the events it publishes on the bus
+        self.log_bus = LogBus()
+        # Zone-scoped triggers may name a zone by its /who name too
+        self.log_bus.set_zone_aliases(ZONES.aliases())
+        self.log_bus.subscribe((EVENT_TOON, EVENT_ZONE, EVENT_SLAIN), self.handle_log_event)
+        self.overlays_window.attach_log_bus(self.log_bus)
+        # Alerts from backlog lines older than this (seconds) are not replayed
+        catchup_max_age = self.settings.value(
+            "General/catchup_max_age", 30, type=int)
+        # Pick up logs where the last run stopped instead of at EOF
+        resume_logs = self.settings.value(
+            "General/resume_logs", True, type=bool)
+        # How much of the end of a log (bytes) may be scanned for the last zone
+        zone_scan_bytes = self.settings.value(
+            "General/zone_scan_bytes", 16 * 1024 * 1024, type=int)
+        # Line templates remembered per toon as matching nothing
+        line_cache_size = self.settings.value(
+            "General/line_cache_size", 4096, type=int)
+        self.log_worker = LogIngestWorker(
+            self.log_dir, self.log_bus, ZONES, log_watch_mode, catchup_max_age,
+            self.multi_toon, os.path.join(config_dir, "log-checkpoints.ini"), resume_logs,
+            zone_scan_bytes, line_cache_size)
+        self.log_worker.events_ready.connect(self.log_bus.publish)
+        self.log_worker.start()
 
-    def load_active_log_file(self):
-        try:
-            if not os.path.exists(self.log_dir):
-                return False
-            log_files = [f for f in os.listdir(
-                self.log_dir) if f.startswith("eqlog_")]
-            if not log_files:
-                return False
-            log_files = sorted(log_files, key=lambda f: os.stat(
-                os.path.join(self.log_dir, f)).st_mtime, reverse=True)
-            new_log_file = log_files[0]
-            new_toon = new_log_file.split("_")[1]
-            if new_log_file != self.log_path or (self.log_file and self.log_file.closed):
-                self.log_path = new_log_file
-                self.toon_name = new_toon
-                if self.log_file and not self.log_file.closed:
-                    self.log_file.close()
-                    self.log_file = None
-                try:
-                    self.log_file = open(os.path.join(
-                        self.log_dir, new_log_file), "r")
-                    self.log_file.seek(0, os.SEEK_END)
-                    self.log_position = self.log_file.tell()
-                except Exception as e:
-                    self.log_file = None
-                    self.log_path = None
-                    self.log_position = 0
-                    return False
-                if self.timer_window and hasattr(self.timer_window, 'update_toon'):
-                    self.timer_window.update_toon(
-                        self.toon_name, self.log_file, self.log_path, self.log_position, self.current_zone, self.zone_timer)
-                if self.voice_window and hasattr(self.voice_window, 'update_log_info'):
-                    self.voice_window.update_log_info(
-                        self.log_file, self.log_path, self.log_position, self.toon_name)
-                return True
-            return True
-        except Exception as e:
-            self.log_file = None
-            self.log_path = None
-            self.log_position = 0
-            return False
-
-    def update_log_position(self):
-        try:
-            if not self.log_file or not os.path.exists(self.log_path) or self.log_file.closed:
-                if not self.load_active_log_file():
-                    return
-            self.log_file.seek(self.log_position)
-            new_lines = self.log_file.readlines()
-            self.log_position = self.log_file.tell()
-            for line in new_lines:
-                clean_line = re.sub(r'^\[.*?\]\s', '', line.strip())
-                if clean_line:
-                    # Zone detection
-                    zone_entry = re.match(
-                        r"You have entered (.*?)\.", clean_line)
-                    who_single = re.match(
-                        r"There is 1 player in (.*?)\.", clean_line)
-                    who_multi = re.match(
-                        r"There are \d+ players in (.*?)\.", clean_line)
-                    zone_name = None
-                    if zone_entry:
-                        zone_name = zone_entry.group(1)
-                    elif who_single:
-                        zone_name = WHO_TO_ZONE.get(
-                            who_single.group(1), who_single.group(1))
-                    elif who_multi:
-                        zone_name = WHO_TO_ZONE.get(
-                            who_multi.group(1), who_multi.group(1))
-                    if zone_name and zone_name != self.current_zone:
-                        self.current_zone = zone_name
-                        self.zone_timer = ZONE_TIMERS.get(zone_name, 400)
-                        print(f"Detected zone: {self.current_zone}, timer: {
-                              self.zone_timer} seconds")
-                        if self.timer_window and hasattr(self.timer_window, 'update_zone'):
-                            self.timer_window.update_zone(
-                                self.current_zone, self.zone_timer)
-                    if self.voice_window and self.voice_window.enabled and hasattr(self.voice_window, 'process_log_line'):
-                        self.voice_window.process_log_line(clean_line)
-                    if self.overlays_window and self.overlays_window.enabled and hasattr(self.overlays_window, 'process_log_line'):
-                        self.overlays_window.process_log_line(clean_line)
-
-        except Exception as e:
-            self.log_file = None
-            self.log_path = None
-            self.log_position = 0
-            self.load_active_log_file()
+    def handle_log_event(self, event):
+        if event.kind == EVENT_TOON:
+            self.toon_name, self.log_path = event.data
+            self.current_zone, self.zone_timer = self.toon_zones.get(
+                self.toon_name, ("Unknown", 400))
+            self.session.mark_dirty()
+        elif event.kind == EVENT_ZONE:
+            if event.data != self.toon_zones.get(event.toon, (None,))[0]:
+                zone_timer = ZONES.respawn(event.data)
+                self.toon_zones[event.toon] = (event.data, zone_timer)
+                if event.toon == self.toon_name:
+                    self.current_zone = event.data
+                    self.zone_timer = zone_timer
+                print(f"Detected zone for {event.toon}: {event.data}, timer: {
+                      zone_timer} seconds")
+                if self.timer_window and hasattr(self.timer_window, 'update_zone'):
+                    self.timer_window.update_zone(
+                        event.data, zone_timer, event.toon)
+                self.session.mark_dirty()
+        elif event.kind == EVENT_SLAIN:
+            zone = self.toon_zones.get(event.toon, ("Unknown",))[0]
+            if zone != "Unknown":
+                self.kill_history.record(
+                    zone, event.data, event.timestamp, ZONES.respawn(zone, event.data))
 
     def setup_menu(self):
         timer_action = QAction("Timer Tool", self.menu)
@@ -323,6 +134,14 @@ class MainApp:
         overlay_action = QAction("Overlays", self.menu)
         overlay_action.triggered.connect(self.show_overlays)
         self.menu.addAction(overlay_action)
+        multi_toon_action = QAction("Multi-Toon Mode", self.menu)
+        multi_toon_action.setCheckable(True)
+        multi_toon_action.setChecked(self.multi_toon)
+        multi_toon_action.toggled.connect(self.toggle_multi_toon)
+        self.menu.addAction(multi_toon_action)
+        line_cache_action = QAction("Line Cache Stats", self.menu)
+        line_cache_action.triggered.connect(self.show_line_cache_stats)
+        self.menu.addAction(line_cache_action)
         settings_action = QAction("Set Log Directory", self.menu)
         settings_action.triggered.connect(self.select_log_directory)
         self.menu.addAction(settings_action)
@@ -331,18 +150,66 @@ class MainApp:
         self.menu.addAction(quit_action)
 
     def launch_timer_tool(self):
-        if not self.timer_window:
-            self.timer_window = MobTimerApp(self.log_dir, self.toon_name, self.log_file,
-                                            self.log_path, self.log_position, self.current_zone, self.zone_timer)
+        self.create_timer_window()
         self.timer_window.show()
 
+    def create_timer_window(self):
+        if not self.timer_window:
+            self.timer_window = MobTimerApp(
+                self.log_dir, self.toon_name, self.current_zone, self.zone_timer,
+                self.toon_zones, self.multi_toon, self.timer_scheduler, self.kill_history)
+            self.timer_window.spawn_warning.connect(self.warn_spawn)
+            timers = self.timer_window.timers
+            for signal in (timers.rowsInserted, timers.rowsRemoved, timers.dataChanged,
+                           timers.modelReset):
+                signal.connect(self.session.mark_dirty)
+
+    def snapshot_session(self):
+        return {
+            "toon": self.toon_name,
+            "toon_zones": {toon: zone for toon, (zone, _) in self.toon_zones.items()},
+            "timers": self.timer_window.snapshot_timers() if self.timer_window else [],
+            "bars": self.overlays_window.snapshot_bars(),
+        }
+
+    def restore_session(self, state):
+        self.toon_zones = {toon: (zone, ZONES.respawn(zone))
+                           for toon, zone in state.get("toon_zones", {}).items()}
+        self.toon_name = state.get("toon", self.toon_name)
+        self.current_zone, self.zone_timer = self.toon_zones.get(
+            self.toon_name, (self.current_zone, self.zone_timer))
+        self.overlays_window.set_active_toon(self.toon_name)
+        self.overlays_window.restore_bars(state.get("bars", []))
+        if state.get("timers"):
+            # Timers keep running in the (hidden) window until it is opened
+            self.create_timer_window()
+            self.timer_window.restore_timers(state["timers"])
+        self.session.dirty = False
+
     def launch_voice_notifications(self):
+        self.create_voice_window()
+        self.voice_window.show()
+
+    def create_voice_window(self):
         if not self.voice_window:
             self.voice_window = VoiceNotificationsApp(
                 self.log_dir, self.toon_name)
-            self.voice_window.update_log_info(
-                self.log_file, self.log_path, self.log_position, self.toon_name)
-        self.voice_window.show()
+            self.voice_window.attach_log_bus(self.log_bus)
+
+    def warn_spawn(self, mob_name, seconds):
+        via = self.timer_window.warning_via
+        # Voice warnings follow the voice notifications' on/off switch; with
+        # voice off they show as an overlay instead
+        voice = (via in ("voice", "both") and self.voice_window is not None
+                 and self.voice_window.enabled)
+        if voice:
+            spoken = (f"{seconds} second{'s' if seconds != 1 else ''}" if seconds < 120
+                      else f"{round(seconds / 60)} minutes")
+            self.voice_window.speak(f"{mob_name} spawns in {spoken}")
+        if via in ("overlay", "both") or not voice:
+            # The bar runs out as the mob spawns
+            self.overlays_window.show_overlay(
+                {'message': f"{mob_name} spawns", 'duration': seconds}, time.time())
 
     def show_overlays(self):
         if self.overlays_window:
@@ -351,10 +218,28 @@ class MainApp:
     # def launch_overlays(self):
     #     if not self.overlays_window:
     #         self.overlays_window = OverlaysApp(self.log_dir, self.toon_name)
-    #         self.overlays_window.update_log_info(
-    #             self.log_file, self.log_path, self.log_position, self.toon_name)
+    #         self.log_bus.subscribe(
+    #             self.overlays_window.LOG_EVENT_KINDS, self.overlays_window.handle_log_event)
     #     self.overlays_window.show()
 
+    def toggle_multi_toon(self, checked):
+        self.multi_toon = checked
+        self.settings.beginGroup("General")
+        self.settings.setValue("multi_toon", checked)
+        self.settings.endGroup()
+        self.settings.sync()
+        self.log_worker.set_multi_toon(checked)
+        if self.timer_window:
+            self.timer_window.set_multi_toon(checked)
+
+    def show_line_cache_stats(self):
+        routed, skipped, templates = self.log_worker.line_cache_stats()
+        hit_rate = skipped / routed * 100 if routed else 0
+        QMessageBox.information(
+            None, "Line Cache Stats",
+            f"Lines routed: {routed}\nSkipped after one lookup: {skipped} ({hit_rate:.1f}%)\n"
+            f"Templates cached: {templates}")
+
     def select_log_directory(self):
         directory = QFileDialog.getExistingDirectory(
             None, "Select Log Directory", self.log_dir)
@@ -364,18 +249,17 @@ class MainApp:
             self.settings.setValue("log_dir", self.log_dir)
             self.settings.endGroup()
             self.settings.sync()
-            if self.log_file and not self.log_file.closed:
-                self.log_file.close()
-                self.log_file = None
             self.log_path = None
-            self.log_position = 0
+            self.toon_zones = {}
             self.current_zone = "Unknown"
             self.zone_timer = 400
-            self.load_active_log_file()
+            self.session.mark_dirty()
+            self.log_worker.set_log_dir(self.log_dir)
 
     def quit(self):
-        if self.log_file and not self.log_file.closed:
-            self.log_file.close()
+        self.log_worker.stop()
+        self.kill_history.close()
+        self.session.flush()
         self.app.quit()
 
     def run(self):
@@ -1,20 +1,55 @@
-from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QLineEdit, QCheckBox, QLabel, QListWidget, QMessageBox, QProgressBar
-from PyQt6.QtCore import QSettings, Qt, QTimer, QPoint
+from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QLineEdit, QCheckBox, QLabel, QListWidget, QMessageBox
+from PyQt6.QtGui import QBrush, QColor, QFont, QFontMetrics, QPainter, QPen, QStaticText
+from PyQt6.QtCore import QSettings, Qt, QPoint, QPointF, QRectF, pyqtSignal
+import bisect
+import math
 import os
 import re
+import time
+import urllib.parse
+from log_bus import EVENT_OVERLAY, EVENT_TOON, EVENT_TRIGGER_DISABLED
+from trigger_matcher import REGEX_PREFIX, is_regex_trigger, check_trigger_pattern
+from timer_scheduler import TimerScheduler, format_remaining
+
+
+# Bar geometry (pixels)
+BAR_HEIGHT = 20
+BAR_SPACING = 2
+BAR_MARGIN = 4
+BAR_TEXT_PADDING = 4
+MIN_BAR_WIDTH = 200
 
 
 class OverlayManager(QWidget):
-    def __init__(self):
+    """The overlay window: paints every timer bar itself.
+
+    Bars are plain objects kept in a list, highest priority first and then
+    soonest to run out, so adding or removing one is a list operation and a
+    repaint. Pens, brushes, the font and each bar's message text are set up
+    once instead of per paint.
+    """
+    bars_changed = pyqtSignal()
+
+    def __init__(self, scheduler):
         super().__init__()
+        # Bars expire through the shared scheduler and redraw on its tick
+        self.scheduler = scheduler
+        self.scheduler.tick.connect(self.refresh_bars)
         self.setWindowFlags(Qt.WindowType.WindowStaysOnTopHint |
                             Qt.WindowType.FramelessWindowHint | Qt.WindowType.Tool | Qt.WindowType.Popup)
         self.setAttribute(Qt.WidgetAttribute.WA_TranslucentBackground)
-        self.layout = QVBoxLayout()
-        self.layout.setContentsMargins(4, 4, 4, 4)
-        self.layout.setSpacing(2)
-        self.setLayout(self.layout)
+        self.bars = []  # [TimerBar], sorted by TimerBar.sort_key
+        self.text_width = 0  # Of the widest bar message
+        self.bar_font = QFont(self.font())
+        self.bar_font.setBold(True)
+        self.font_metrics = QFontMetrics(self.bar_font)
+        self.time_width = self.font_metrics.horizontalAdvance(" (00:00:00)")
+        self.background_brush = QBrush(QColor(224, 224, 224, 150))
+        self.border_pen = QPen(QColor(160, 160, 160, 150))
+        self.chunk_brush = QBrush(QColor(53, 94, 59, 200))
+        self.text_pen = QPen(QColor("white"))
         self.old_pos = None
+        self.resize_to_bars()
         self.setWindowOpacity(0.8)  # Optional: Adjust for visibility
 
     def showEvent(self, event):
@@ -33,64 +68,87 @@ class OverlayManager(QWidget):
             self.old_pos = event.globalPosition().toPoint()
 
     def add_bar(self, bar):
-        self.layout.addWidget(bar)
+        index = bisect.bisect_right(self.bars, bar.sort_key, key=lambda other: other.sort_key)
+        self.bars.insert(index, bar)
+        self.text_width = max(self.text_width, bar.text_width)
+        self.resize_to_bars()
+        self.update()
         if not self.isVisible():
             self.show()  # Will use showWithoutActivating due to setAttribute
+        self.bars_changed.emit()
 
     def remove_bar(self, bar):
-        self.layout.removeWidget(bar)
-        bar.deleteLater()
-        if self.layout.count() == 0:
+        self.scheduler.cancel(bar)
+        if bar not in self.bars:
+            return
+        self.bars.remove(bar)
+        if bar.text_width == self.text_width:
+            self.text_width = max((other.text_width for other in self.bars), default=0)
+        if not self.bars:
             self.hide()
+        else:
+            self.resize_to_bars()
+            self.update()
+        self.bars_changed.emit()
 
+    def resize_to_bars(self):
+        # Wide enough for the longest message plus the time and text padding
+        width = max(MIN_BAR_WIDTH, self.text_width + self.time_width + 2 * BAR_TEXT_PADDING)
+        height = max(0, len(self.bars) * (BAR_HEIGHT + BAR_SPACING) - BAR_SPACING)
+        self.setFixedSize(width + 2 * BAR_MARGIN, height + 2 * BAR_MARGIN)
 
-class TimerBar(QProgressBar):
-    def __init__(self, message, duration, manager):
-        super().__init__()
+    def refresh_bars(self):
+        if self.isVisible():
+            self.update()
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        painter.setFont(self.bar_font)
+        now = self.scheduler.now()
+        width = self.width() - 2 * BAR_MARGIN
+        text_y = (BAR_HEIGHT - self.font_metrics.height()) / 2
+        for index, bar in enumerate(self.bars):
+            top = BAR_MARGIN + index * (BAR_HEIGHT + BAR_SPACING)
+            rect = QRectF(BAR_MARGIN + 0.5, top + 0.5, width - 1, BAR_HEIGHT - 1)
+            painter.setPen(self.border_pen)
+            painter.setBrush(self.background_brush)
+            painter.drawRoundedRect(rect, 2, 2)
+            remaining = math.ceil(max(0.0, (self.scheduler.deadline(bar) or now) - now))
+            fraction = min(1.0, remaining / bar.duration) if bar.duration > 0 else 0.0
+            painter.fillRect(QRectF(BAR_MARGIN + 1, top + 1, (width - 2) * fraction, BAR_HEIGHT - 2),
+                             self.chunk_brush)
+            painter.setPen(self.text_pen)
+            painter.drawStaticText(QPointF(BAR_MARGIN + BAR_TEXT_PADDING, top + text_y), bar.text)
+            painter.drawText(
+                QRectF(BAR_MARGIN + BAR_TEXT_PADDING + bar.text_width, top,
+                       self.time_width, BAR_HEIGHT),
+                Qt.AlignmentFlag.AlignLeft | Qt.AlignmentFlag.AlignVCenter,
+                f" ({format_remaining(remaining)})")
+
+
+class TimerBar:
+    def __init__(self, message, duration, manager, ends_at=None, priority=0):
         self.manager = manager
+        self.priority = priority
         self.message = message
         self.duration = duration
-        self.remaining = duration
-        self.setFixedHeight(20)
-        self.setRange(0, 100)
-        self.setValue(100)
-        self.setTextVisible(True)
-        self.setStyleSheet("""
-            QProgressBar {
-                background-color: rgba(224,224,224,150);
-                border: 1px solid rgba(160,160,160,150);
-                border-radius: 2px;
-                text-align: left;
-                color: white;
-                font-weight: bold;
-            }
-            QProgressBar::chunk {
-                /*background-color: rgba(34,139,34,200);*/
-                background-color: rgba(53,94,59,200);
-            }
-        """)
-        self.setFormat(f"{self.message} (%v:%s)")
-        self.timer = QTimer()
-        self.timer.timeout.connect(self.update_timer)
-        self.timer.start(1000)
-
-    def update_timer(self):
-        self.remaining -= 1
-        if self.remaining <= 0:
-            self.timer.stop()
-            self.manager.remove_bar(self)
-            return
-        percent = (self.remaining / self.duration) * 100
-        self.setValue(int(percent))
-        mins, secs = divmod(self.remaining, 60)
-        self.setFormat(f"{self.message} ({mins}:{secs:02})")
-
-    def paintEvent(self, event):
-        super().paintEvent(event)
+        # ends_at is an epoch time, by default a full duration from now
+        scheduler = self.manager.scheduler
+        deadline = scheduler.now() + duration if ends_at is None else scheduler.at_epoch(ends_at)
+        # Highest priority first, then soonest to run out
+        self.sort_key = (-priority, deadline)
+        # Laid out once; only the remaining time is drawn per paint
+        self.text = QStaticText(message)
+        self.text.setTextFormat(Qt.TextFormat.PlainText)
+        self.text.prepare(font=manager.bar_font)
+        self.text_width = math.ceil(self.text.size().width())
+        scheduler.schedule(self, deadline, self.manager.remove_bar)
 
 
 class OverlaysApp(QWidget):
-    def __init__(self, log_dir, toon_name="Unknown"):
+    LOG_EVENT_KINDS = (EVENT_OVERLAY, EVENT_TOON, EVENT_TRIGGER_DISABLED)
+
+    def __init__(self, log_dir, toon_name="Unknown", scheduler=None):
         super().__init__()
         self.setWindowTitle("Overlays")
         self.log_dir = log_dir if os.path.exists(log_dir) else "/app/logs"
@@ -133,10 +191,35 @@ class OverlaysApp(QWidget):
             for key in self.settings.allKeys():
                 self.toon_triggers[toon].append(self.decode_key(key))
             self.settings.endGroup()
-        self.log_file = None
-        self.log_path = None
-        self.log_position = 0
-        self.overlay_manager = OverlayManager()
+        # Triggers scoped to a zone only fire while the toon is in it
+        self.trigger_zones = {}  # {pattern: zone}
+        self.settings.beginGroup("trigger_zones")
+        for key in self.settings.allKeys():
+            self.trigger_zones[self.decode_key(key)] = self.settings.value(key)
+        self.settings.endGroup()
+        # Every matching trigger fires, highest priority first; an exclusive
+        # one silences the others of its priority and below
+        self.trigger_priority = {}  # {pattern: priority}
+        self.settings.beginGroup("trigger_priority")
+        for key in self.settings.allKeys():
+            self.trigger_priority[self.decode_key(key)] = int(self.settings.value(key))
+        self.settings.endGroup()
+        self.exclusive_triggers = set()
+        self.settings.beginGroup("trigger_exclusive")
+        for key in self.settings.allKeys():
+            self.exclusive_triggers.add(self.decode_key(key))
+        self.settings.endGroup()
+        # Regex triggers the log worker found unsafe or too slow, until edited
+        self.disabled_triggers = {}  # {pattern: reason}
+        self.settings.beginGroup("disabled_triggers")
+        for key in self.settings.allKeys():
+            self.disabled_triggers[self.decode_key(key)] = self.settings.value(key)
+        self.settings.endGroup()
+        # {toon: ((pattern_bytes, data, zone, priority, exclusive), ...)}
+        self.active_triggers = {}
+        self.log_bus = None
+        self.rebuild_active_triggers()
+        self.overlay_manager = OverlayManager(scheduler or TimerScheduler(self))
         overlay_pos = self.settings.value("overlay_pos", QPoint(100, 100))
         self.overlay_manager.move(overlay_pos)
         self.overlay_manager.hide()  # Explicitly hide at start
@@ -144,9 +227,15 @@ class OverlaysApp(QWidget):
         self.update_active_toon_label()
 
     def encode_key(self, key):
+        # Regex patterns are percent-encoded: "/" and "\\" are QSettings
+        # group separators
+        if is_regex_trigger(key):
+            return REGEX_PREFIX + urllib.parse.quote(key[len(REGEX_PREFIX):], safe="")
         return key.replace(" ", "_")
 
     def decode_key(self, key):
+        if is_regex_trigger(key):
+            return REGEX_PREFIX + urllib.parse.unquote(key[len(REGEX_PREFIX):])
         return key.replace("_", " ")
 
     def update_active_toon_label(self):
@@ -227,12 +316,14 @@ class OverlaysApp(QWidget):
         self.trigger_layout.addWidget(self.search_input)
 
         self.table = QTableWidget()
-        self.table.setColumnCount(3)
+        self.table.setColumnCount(6)
         self.table.setHorizontalHeaderLabels(
-            ["Log Pattern", "Overlay Message", "Duration (secs)"])
+            ["Log Pattern", "Overlay Message", "Duration (secs)", "Zone", "Priority", "Exclusive"])
         self.table.setColumnWidth(0, 200)
         self.table.setColumnWidth(1, 200)
         self.table.setColumnWidth(2, 100)
+        self.table.setColumnWidth(3, 150)
+        self.table.setColumnWidth(4, 60)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.itemChanged.connect(self.update_trigger)
         self.trigger_layout.addWidget(self.table)
@@ -240,16 +331,25 @@ class OverlaysApp(QWidget):
         self.input_layout = QHBoxLayout()
         self.pattern_input = QLineEdit()
         self.pattern_input.setPlaceholderText(
-            "Enter log pattern (e.g., You activate Stone Stance.)")
+            "Enter log pattern (e.g., You activate Stone Stance., or re:(\\w+) is mezzed)")
         self.input_layout.addWidget(self.pattern_input)
         self.message_input = QLineEdit()
         self.message_input.setPlaceholderText(
-            "Enter overlay message (e.g., Stone Stance)")
+            "Enter overlay message (e.g., Stone Stance, or Mez {1})")
         self.input_layout.addWidget(self.message_input)
         self.duration_input = QLineEdit()
         self.duration_input.setPlaceholderText(
             "Enter duration in seconds (e.g., 480)")
         self.input_layout.addWidget(self.duration_input)
+        self.zone_input = QLineEdit()
+        self.zone_input.setPlaceholderText(
+            "Zone (optional, e.g., Plane of Fear)")
+        self.input_layout.addWidget(self.zone_input)
+        self.priority_input = QLineEdit()
+        self.priority_input.setPlaceholderText("Priority (optional, e.g., 10)")
+        self.input_layout.addWidget(self.priority_input)
+        self.exclusive_input = QCheckBox("Exclusive")
+        self.input_layout.addWidget(self.exclusive_input)
         self.input_layout_widget = QWidget()
         self.input_layout_widget.setLayout(self.input_layout)
         self.trigger_layout.addWidget(self.input_layout_widget)
@@ -387,6 +487,12 @@ class OverlaysApp(QWidget):
                 pattern_item = QTableWidgetItem(pattern)
                 pattern_item.setFlags(
                     pattern_item.flags() | Qt.ItemFlag.ItemIsEditable)
+                # Renames are told from the pattern the row was loaded with
+                pattern_item.setData(Qt.ItemDataRole.UserRole, pattern)
+                if pattern in self.disabled_triggers:
+                    pattern_item.setForeground(QColor("#d32f2f"))
+                    pattern_item.setToolTip(
+                        f"Disabled: {self.disabled_triggers[pattern]} Edit the trigger to re-enable it.")
                 self.table.setItem(row, 0, pattern_item)
                 message_item = QTableWidgetItem(data['message'])
                 message_item.setFlags(
@@ -396,6 +502,21 @@ class OverlaysApp(QWidget):
                 duration_item.setFlags(
                     duration_item.flags() | Qt.ItemFlag.ItemIsEditable)
                 self.table.setItem(row, 2, duration_item)
+                zone_item = QTableWidgetItem(self.trigger_zones.get(pattern, ""))
+                zone_item.setFlags(
+                    zone_item.flags() | Qt.ItemFlag.ItemIsEditable)
+                self.table.setItem(row, 3, zone_item)
+                priority_item = QTableWidgetItem(
+                    str(self.trigger_priority.get(pattern, 0)))
+                priority_item.setFlags(
+                    priority_item.flags() | Qt.ItemFlag.ItemIsEditable)
+                self.table.setItem(row, 4, priority_item)
+                exclusive_item = QTableWidgetItem()
+                exclusive_item.setFlags(
+                    (exclusive_item.flags() | Qt.ItemFlag.ItemIsUserCheckable) & ~Qt.ItemFlag.ItemIsEditable)
+                exclusive_item.setCheckState(
+                    Qt.CheckState.Checked if pattern in self.exclusive_triggers else Qt.CheckState.Unchecked)
+                self.table.setItem(row, 5, exclusive_item)
         self.table.itemChanged.connect(self.update_trigger)
 
     def filter_triggers(self):
@@ -495,11 +616,21 @@ class OverlaysApp(QWidget):
             if self.current_toon == toon_name:
                 self.current_toon = "Unknown"
                 self.update_active_toon_label()
+            self.rebuild_active_triggers()
 
     def add_trigger(self):
         pattern = self.pattern_input.text().strip()
         message = self.message_input.text().strip()
         duration_str = self.duration_input.text().strip()
+        zone = self.zone_input.text().strip()
+        exclusive = self.exclusive_input.isChecked()
+        error = check_trigger_pattern(pattern)
+        if error:
+            QMessageBox.warning(self, "Invalid Pattern", error)
+            return
+        priority = self.parse_priority(self.priority_input.text())
+        if priority is None:
+            return
         try:
             duration = int(duration_str)
             if pattern and message and duration > 0:
@@ -509,11 +640,17 @@ class OverlaysApp(QWidget):
                 self.settings.setValue(self.encode_key(
                     pattern), f"{message}|{duration}")
                 self.settings.endGroup()
+                self.set_trigger_options(pattern, zone, priority, exclusive)
+                self.set_trigger_disabled(pattern, "")
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_triggers()
                 self.pattern_input.clear()
                 self.message_input.clear()
                 self.duration_input.clear()
+                self.zone_input.clear()
+                self.priority_input.clear()
+                self.exclusive_input.setChecked(False)
         except ValueError:
             QMessageBox.warning(self, "Invalid Input",
                                 "Duration must be a positive integer.")
@@ -527,6 +664,8 @@ class OverlaysApp(QWidget):
                 self.settings.beginGroup("master_overlays")
                 self.settings.remove(self.encode_key(pattern))
                 self.settings.endGroup()
+                self.set_trigger_options(pattern)
+                self.set_trigger_disabled(pattern, "")
                 for toon in self.toon_triggers:
                     if pattern in self.toon_triggers[toon]:
                         self.toon_triggers[toon].remove(pattern)
@@ -534,6 +673,7 @@ class OverlaysApp(QWidget):
                         self.settings.remove(self.encode_key(pattern))
                         self.settings.endGroup()
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_triggers()
 
     def update_trigger(self, item):
@@ -541,19 +681,35 @@ class OverlaysApp(QWidget):
         pattern_item = self.table.item(row, 0)
         message_item = self.table.item(row, 1)
         duration_item = self.table.item(row, 2)
-        if pattern_item and message_item and duration_item:
+        zone_item = self.table.item(row, 3)
+        priority_item = self.table.item(row, 4)
+        exclusive_item = self.table.item(row, 5)
+        if (pattern_item and message_item and duration_item and zone_item
+                and priority_item and exclusive_item):
             new_pattern = pattern_item.text().strip()
             new_message = message_item.text().strip()
+            error = check_trigger_pattern(new_pattern)
+            if error:
+                QMessageBox.warning(self, "Invalid Pattern", error)
+                self.load_triggers()  # Revert
+                return
+            new_priority = self.parse_priority(priority_item.text())
+            if new_priority is None:
+                self.load_triggers()  # Revert
+                return
             try:
                 new_duration = int(duration_item.text().strip())
                 if new_pattern and new_message and new_duration > 0:
-                    old_pattern = next((p for p in self.master_triggers if p != new_pattern and self.table.item(
-                        row, 1).text() == self.master_triggers[p]['message']), None)
-                    if old_pattern and old_pattern in self.master_triggers:
+                    # Only a pattern edit renames; other columns update it in place
+                    old_pattern = pattern_item.data(Qt.ItemDataRole.UserRole)
+                    if (item.column() == 0 and old_pattern != new_pattern
+                            and old_pattern in self.master_triggers):
                         del self.master_triggers[old_pattern]
                         self.settings.beginGroup("master_overlays")
                         self.settings.remove(self.encode_key(old_pattern))
                         self.settings.endGroup()
+                        self.set_trigger_options(old_pattern)
+                        self.set_trigger_disabled(old_pattern, "")
                         for toon in self.toon_triggers:
                             if old_pattern in self.toon_triggers[toon]:
                                 self.toon_triggers[toon].remove(old_pattern)
@@ -571,13 +727,68 @@ class OverlaysApp(QWidget):
                     self.settings.setValue(self.encode_key(new_pattern), f"{
                                            new_message}|{new_duration}")
                     self.settings.endGroup()
+                    self.set_trigger_options(
+                        new_pattern, zone_item.text().strip(), new_priority,
+                        exclusive_item.checkState() == Qt.CheckState.Checked)
+                    self.set_trigger_disabled(new_pattern, "")
                     self.settings.sync()
+                    self.rebuild_active_triggers()
                     self.load_triggers()
             except ValueError:
                 QMessageBox.warning(self, "Invalid Input",
                                     "Duration must be a positive integer.")
                 self.load_triggers()  # Revert
 
+    def set_trigger_disabled(self, pattern, reason):
+        # An empty reason enables the trigger again
+        self.settings.beginGroup("disabled_triggers")
+        if reason:
+            self.disabled_triggers[pattern] = reason
+            self.settings.setValue(self.encode_key(pattern), reason)
+        else:
+            self.disabled_triggers.pop(pattern, None)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+
+    def parse_priority(self, text):
+        try:
+            return int(text.strip() or 0)
+        except ValueError:
+            QMessageBox.warning(self, "Invalid Input",
+                                "Priority must be a whole number.")
+            return None
+
+    def set_trigger_options(self, pattern, zone="", priority=0, exclusive=False):
+        # The defaults make a trigger global, priority 0 and not exclusive
+        self.set_trigger_zone(pattern, zone)
+        self.settings.beginGroup("trigger_priority")
+        if priority:
+            self.trigger_priority[pattern] = priority
+            self.settings.setValue(self.encode_key(pattern), priority)
+        else:
+            self.trigger_priority.pop(pattern, None)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+        self.settings.beginGroup("trigger_exclusive")
+        if exclusive:
+            self.exclusive_triggers.add(pattern)
+            self.settings.setValue(self.encode_key(pattern), "true")
+        else:
+            self.exclusive_triggers.discard(pattern)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+
+    def set_trigger_zone(self, pattern, zone):
+        # An empty zone makes the trigger global again
+        self.settings.beginGroup("trigger_zones")
+        if zone:
+            self.trigger_zones[pattern] = zone
+            self.settings.setValue(self.encode_key(pattern), zone)
+        else:
+            self.trigger_zones.pop(pattern, None)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+
     def add_toon_trigger(self, row, column):
         if row >= 0:
             pattern = self.master_triggers_table.item(row, 0).text()
@@ -589,6 +800,7 @@ class OverlaysApp(QWidget):
                 self.settings.setValue(self.encode_key(pattern), "true")
                 self.settings.endGroup()
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_toon_triggers()
 
     def remove_toon_trigger(self, row, column):
@@ -602,31 +814,74 @@ class OverlaysApp(QWidget):
                 self.settings.remove(self.encode_key(pattern))
                 self.settings.endGroup()
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_toon_triggers()
 
     def toggle_overlays(self, state):
         self.enabled = state == Qt.CheckState.Checked.value
         self.settings.setValue("overlays_enabled", self.enabled)
         self.settings.sync()
-
-    def process_log_line(self, line):
-        if not self.enabled or not self.current_toon or self.current_toon not in self.toon_triggers:
+        self.rebuild_active_triggers()
+
+    def attach_log_bus(self, log_bus):
+        self.log_bus = log_bus
+        log_bus.subscribe(self.LOG_EVENT_KINDS, self.handle_log_event)
+        self.rebuild_active_triggers()
+
+    def rebuild_active_triggers(self):
+        """Hand every toon's triggers to the log bus, which compiles them into
+        the matchers the log worker runs (several toons may be tailed, each
+        matched against its global triggers plus its current zone's)."""
+        self.active_triggers = {
+            toon: tuple(
+                (pattern.encode(), self.master_triggers[pattern],
+                 self.trigger_zones.get(pattern), self.trigger_priority.get(pattern, 0),
+                 pattern in self.exclusive_triggers)
+                for pattern in patterns
+                if self.master_triggers.get(pattern)
+                and pattern not in self.disabled_triggers)
+            for toon, patterns in self.toon_triggers.items()
+        } if self.enabled else {}
+        if self.log_bus:
+            self.log_bus.set_triggers(EVENT_OVERLAY, self.active_triggers)
+
+    def show_overlay(self, data, started_at, priority=0):
+        # Count from the trigger's log time so late-read lines are aged correctly
+        ends_at = started_at + data['duration']
+        if ends_at <= time.time():
+            return
+        bar = TimerBar(data['message'], data['duration'],
+                       self.overlay_manager, ends_at, priority)
+        self.overlay_manager.add_bar(bar)
+
+    def snapshot_bars(self):
+        scheduler = self.overlay_manager.scheduler
+        return [[bar.message, bar.duration, scheduler.to_epoch(scheduler.deadline(bar)), bar.priority]
+                for bar in self.overlay_manager.bars]
+
+    def restore_bars(self, bars):
+        for message, duration, ends_at, priority in bars:
+            self.show_overlay({'message': message, 'duration': duration},
+                              ends_at - duration, priority)
+
+    def handle_log_event(self, event):
+        if event.kind == EVENT_OVERLAY:
+            self.show_overlay(event.data, event.timestamp, event.priority)
+        elif event.kind == EVENT_TOON:
+            self.set_active_toon(event.data[0])
+        elif event.kind == EVENT_TRIGGER_DISABLED:
+            self.disable_trigger(*event.data)
+
+    def disable_trigger(self, pattern, reason):
+        if pattern not in self.master_triggers or pattern in self.disabled_triggers:
             return
-        for pattern in self.toon_triggers.get(self.current_toon, []):
-            if pattern in line:  # Simple substring match; use re for advanced
-                data = self.master_triggers.get(pattern, {})
-                if data:
-                    bar = TimerBar(data['message'],
-                                   data['duration'], self.overlay_manager)
-                    self.overlay_manager.add_bar(bar)
-                    break
-
-    def update_log_info(self, log_file, log_path, log_position, toon_name):
-        if self.log_file and self.log_file != log_file:
-            self.log_file.close()
-        self.log_file = log_file
-        self.log_path = log_path
-        self.log_position = log_position
+        print(f"Disabling trigger {pattern!r}: {reason}")
+        self.set_trigger_disabled(pattern, reason)
+        self.settings.sync()
+        self.rebuild_active_triggers()
+        self.load_triggers()
+
+    def set_active_toon(self, toon_name):
         self.current_toon = toon_name
         self.update_active_toon_label()
 
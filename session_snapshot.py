@@ -0,0 +1,101 @@
+import json
+import os
+from PyQt6.QtCore import QObject, QThread, QTimer
+
+# A change is written out at most this long (milliseconds) after it happens;
+# further changes in the meantime ride along with the same write
+SNAPSHOT_DELAY_MS = 2000
+SNAPSHOT_VERSION = 1
+
+
+class SnapshotWriter(QThread):
+    def __init__(self, path, state):
+        super().__init__()
+        self.path = path
+        self.state = state
+
+    def run(self):
+        # Written aside and renamed over the old snapshot, so a crash
+        # mid-write never leaves a truncated file behind
+        temp_path = self.path + ".tmp"
+        try:
+            with open(temp_path, "w", encoding="utf-8") as f:
+                json.dump(self.state, f, separators=(",", ":"))
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(temp_path, self.path)
+        except OSError as e:
+            print(f"Error saving session snapshot: {e}")
+
+
+class SessionSnapshot(QObject):
+    """Running timers, overlay bars and zones, saved so a restart (or a
+    crash) picks up where the last run left off.
+
+    `collect` returns the state as plain data with deadlines as epoch
+    times, so restoring accounts for the time the app was not running.
+    Changes only mark the snapshot dirty; it is collected on the GUI thread
+    once the delay passes and written by a background thread.
+    """
+
+    def __init__(self, path, collect, parent=None):
+        super().__init__(parent)
+        self.path = path
+        self.collect = collect
+        self.dirty = False
+        self.pending = False
+        self.writer = None
+        self.save_timer = QTimer(self)
+        self.save_timer.setSingleShot(True)
+        self.save_timer.setInterval(SNAPSHOT_DELAY_MS)
+        self.save_timer.timeout.connect(self.save)
+
+    def load(self):
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                state = json.load(f)
+        except FileNotFoundError:
+            return {}
+        except (OSError, ValueError) as e:
+            print(f"Ignoring unreadable session snapshot: {e}")
+            return {}
+        if not isinstance(state, dict) or state.get("version") != SNAPSHOT_VERSION:
+            print("Ignoring session snapshot from an incompatible version")
+            return {}
+        return state
+
+    def mark_dirty(self, *args):
+        # Takes (and ignores) the arguments of the signals it is connected to
+        self.dirty = True
+        if not self.save_timer.isActive():
+            self.save_timer.start()
+
+    def snapshot(self):
+        self.dirty = False
+        state = self.collect()
+        state["version"] = SNAPSHOT_VERSION
+        return state
+
+    def save(self):
+        if not self.dirty:
+            return
+        if self.writer and self.writer.isRunning():
+            # Written again with the latest state once this write is done
+            self.pending = True
+            return
+        self.writer = SnapshotWriter(self.path, self.snapshot())
+        self.writer.finished.connect(self.write_finished)
+        self.writer.start()
+
+    def write_finished(self):
+        if self.pending:
+            self.pending = False
+            self.save()
+
+    def flush(self):
+        """Write any unsaved change right away (on quit)."""
+        self.save_timer.stop()
+        if self.writer:
+            self.writer.wait()
+        if self.dirty:
+            SnapshotWriter(self.path, self.snapshot()).run()
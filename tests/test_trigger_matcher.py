@@ -0,0 +1,44 @@
+import os
+import sys
+import unittest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from trigger_matcher import MAX_REGEX_LINE_BYTES, TriggerMatcher, check_trigger_pattern
+
+
+class CheckTriggerPatternTest(unittest.TestCase):
+    """Patterns that can backtrack for seconds on one long line must be
+    rejected when the trigger is saved."""
+
+    def test_rejects_nested_repeats_in_bounded_repeats(self):
+        for pattern in (r"re:(?:\w+ ?){1,50}x", r"re:(\w+ ){0,30}x",
+                        r"re:(?:a{1,20}){1,20}b"):
+            with self.subTest(pattern=pattern):
+                self.assertIsNotNone(check_trigger_pattern(pattern))
+
+    def test_rejects_overlapping_repeats_around_optional_items(self):
+        for pattern in (r"re:(\w+) ?(\w+) ?(\w+) points", r"re:\w+ ?\w+ ?\w+x",
+                        r"re:\d+\.?\d+x"):
+            with self.subTest(pattern=pattern):
+                self.assertIsNotNone(check_trigger_pattern(pattern))
+
+    def test_accepts_common_patterns(self):
+        for pattern in (r"re:(\w+) hits you for (\d+) points? of damage",
+                        r"re:^(\w+) tells you, '(.+)'$", r"re:(\d{2}:){2}\d+",
+                        r"re:(?:ab|cd){1,3}x", r"re:^(\w+) ?says", "Your root has broken"):
+            with self.subTest(pattern=pattern):
+                self.assertIsNone(check_trigger_pattern(pattern))
+
+
+class TriggerMatcherTest(unittest.TestCase):
+    def test_end_anchor_does_not_match_at_the_cap_of_a_long_line(self):
+        matcher = TriggerMatcher([(b"re:foo$", "voice", "end", 0, False),
+                                  (b"re:o$", "voice", "short", 0, False)])
+        line = b"x" * (MAX_REGEX_LINE_BYTES - 3) + b"foo and more"
+        self.assertEqual(matcher.match(line), [])
+        self.assertEqual(len(matcher.match(b"ends with foo")), 2)
+
+
+if __name__ == "__main__":
+    unittest.main()
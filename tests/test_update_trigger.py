@@ -0,0 +1,90 @@
+import os
+import sys
+import tempfile
+import unittest
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PyQt6.QtCore import Qt
+from PyQt6.QtWidgets import QApplication
+
+from overlays_app import OverlaysApp
+from voice_notifications_app import VoiceNotificationsApp
+
+
+def row_of(table, pattern):
+    return next(row for row in range(table.rowCount())
+                if table.item(row, 0).text() == pattern)
+
+
+def add_trigger(app, pattern, message, duration=None):
+    app.pattern_input.setText(pattern)
+    app.message_input.setText(message)
+    if duration is not None:
+        app.duration_input.setText(str(duration))
+    app.add_trigger()
+
+
+class UpdateTriggerTest(unittest.TestCase):
+    """Editing a trigger row must only rename on a pattern edit, even when
+    another trigger shares the message."""
+
+    @classmethod
+    def setUpClass(cls):
+        cls.qapp = QApplication.instance() or QApplication([])
+
+    def setUp(self):
+        # The apps keep their settings in ./config
+        self.old_cwd = os.getcwd()
+        self.temp_dir = tempfile.TemporaryDirectory()
+        os.chdir(self.temp_dir.name)
+
+    def tearDown(self):
+        os.chdir(self.old_cwd)
+        self.temp_dir.cleanup()
+
+    def test_voice_priority_edit_keeps_trigger_sharing_message(self):
+        app = VoiceNotificationsApp(self.temp_dir.name)
+        add_trigger(app, "Your root has broken", "Root broke")
+        add_trigger(app, "Your root spell has worn off", "Root broke")
+        app.toon_triggers["Bob"] = ["Your root spell has worn off"]
+
+        app.table.item(row_of(app.table, "Your root has broken"), 3).setText("5")
+
+        self.assertIn("Your root has broken", app.master_triggers)
+        self.assertIn("Your root spell has worn off", app.master_triggers)
+        self.assertEqual(app.trigger_priority.get("Your root has broken"), 5)
+        self.assertEqual(app.toon_triggers["Bob"], ["Your root spell has worn off"])
+
+    def test_voice_pattern_edit_renames_trigger(self):
+        app = VoiceNotificationsApp(self.temp_dir.name)
+        add_trigger(app, "Your root has broken", "Root broke")
+        add_trigger(app, "Your root spell has worn off", "Root broke")
+        app.toon_triggers["Bob"] = ["Your root has broken"]
+
+        app.table.item(row_of(app.table, "Your root has broken"), 0).setText("Your root broke")
+
+        self.assertNotIn("Your root has broken", app.master_triggers)
+        self.assertIn("Your root broke", app.master_triggers)
+        self.assertIn("Your root spell has worn off", app.master_triggers)
+        self.assertEqual(app.toon_triggers["Bob"], ["Your root broke"])
+
+    def test_overlay_zone_and_exclusive_edits_keep_trigger_sharing_message(self):
+        app = OverlaysApp(self.temp_dir.name)
+        add_trigger(app, "A", "Mez", 30)
+        add_trigger(app, "B", "Mez", 30)
+
+        app.table.item(row_of(app.table, "A"), 3).setText("Plane of Fear")
+        app.table.item(row_of(app.table, "B"), 5).setCheckState(Qt.CheckState.Checked)
+
+        self.assertIn("A", app.master_triggers)
+        self.assertIn("B", app.master_triggers)
+        self.assertEqual(app.trigger_zones.get("A"), "Plane of Fear")
+        self.assertNotIn("B", app.trigger_zones)
+        self.assertIn("B", app.exclusive_triggers)
+        self.assertNotIn("A", app.exclusive_triggers)
+
+
+if __name__ == "__main__":
+    unittest.main()
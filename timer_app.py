@@ -1,110 +1,110 @@
+import bisect
+import math
 import os
 import re
 from time import time
 from pathlib import Path
 from PyQt6.QtWidgets import (
-    QApplication, QWidget, QLabel, QVBoxLayout, QScrollArea, QLineEdit, QMenu
+    QApplication, QWidget, QLabel, QVBoxLayout, QLineEdit, QMenu, QListView,
+    QStyledItemDelegate, QStyle, QAbstractItemView
 )
-from PyQt6.QtGui import QAction
-from PyQt6.QtCore import Qt, QTimer, pyqtSignal
+from PyQt6.QtGui import QAction, QColor, QFont, QPen
+from PyQt6.QtCore import (
+    Qt, QAbstractListModel, QModelIndex, QSettings, QSize, QSortFilterProxyModel, pyqtSignal
+)
+from log_bus import EVENT_SLAIN, EVENT_TOON
+from timer_scheduler import TimerScheduler, format_remaining
+from zone_registry import ZONES, normalize_name
 
 class MobTimerApp(QWidget):
-    def __init__(self, log_dir, toon_name, log_file, log_path, log_position, current_zone, zone_timer):
+    LOG_EVENT_KINDS = (EVENT_SLAIN, EVENT_TOON)
+    # (message, seconds to respawn), delivered by the main app through the
+    # voice or overlay path
+    spawn_warning = pyqtSignal(str, int)
+
+    def __init__(self, log_dir, toon_name, current_zone, zone_timer, toon_zones=None, multi_toon=False,
+                 scheduler=None, kill_history=None):
         super().__init__()
         self.setWindowTitle("Mob Respawn Timers")
         self.log_dir = log_dir
         self.toon_name = toon_name
-        self.log_file = log_file
-        self.log_path = log_path
-        self.log_position = log_position
         self.current_zone = current_zone
         self.zone_timer = zone_timer  # In seconds
-        self.timers = {}  # {mob_key: [QLabel, seconds, QTimer, mob_name]}
-        self.mob_counts = {}
+        # Each tailed toon keeps its own zone, so kills use that toon's timer
+        self.toon_zones = dict(toon_zones or {})  # {toon: (zone, zone_timer)}
+        self.multi_toon = multi_toon
+        self.kill_counts = {}  # {(mob name, toon): (log second, kills in it)}
+        # Deadlines live in the scheduler shared with the overlays; its
+        # tick only repaints the rows currently on screen
+        self.scheduler = scheduler or TimerScheduler(self)
+        self.scheduler.tick.connect(self.refresh_timers)
+        self.timers = TimerListModel(self.scheduler, self)
+        # Suggests learned respawn times in place of the zone's
+        self.kill_history = kill_history
+        config_dir = os.path.abspath("./config")
+        os.makedirs(config_dir, exist_ok=True)
+        self.settings = QSettings(os.path.join(
+            config_dir, "mob-timers.ini"), QSettings.Format.IniFormat)
+        self.load_spawn_warnings()
         self.setup_ui()
-        self.poll_timer = QTimer(self)
-        self.poll_timer.timeout.connect(self.check_new_log_lines)
-        self.toon_check_timer = QTimer(self)
-        self.toon_check_timer.timeout.connect(self.check_for_new_toon)
 
-    def update_toon(self, toon_name, log_file, log_path, log_position, current_zone, zone_timer):
+    def load_spawn_warnings(self):
+        """Warnings go out this many seconds before a respawn, for the mobs
+        and color tags they are turned on for (from the context menu)."""
+        self.settings.beginGroup("spawn_warnings")
+        offsets = self.settings.value("offsets", "60, 10", type=str)
+        self.warning_offsets = sorted(
+            {int(offset) for offset in offsets.split(",") if offset.strip().isdigit()},
+            reverse=True)
+        self.warning_mobs = {normalize_name(mob) for mob in
+                             self.settings.value("mobs", "", type=str).split(",") if mob.strip()}
+        self.warning_colors = {color.strip() for color in
+                               self.settings.value("colors", "", type=str).split(",") if color.strip()}
+        # "voice", "overlay" or "both"
+        self.warning_via = self.settings.value("via", "voice", type=str)
+        self.settings.endGroup()
+
+    def save_spawn_warnings(self):
+        self.settings.beginGroup("spawn_warnings")
+        self.settings.setValue("offsets", ", ".join(str(offset) for offset in self.warning_offsets))
+        self.settings.setValue("mobs", ", ".join(sorted(self.warning_mobs)))
+        self.settings.setValue("colors", ", ".join(sorted(self.warning_colors)))
+        self.settings.setValue("via", self.warning_via)
+        self.settings.endGroup()
+        self.settings.sync()
+
+    def update_toon(self, toon_name, current_zone, zone_timer):
         self.toon_name = toon_name
-        self.log_file = log_file
-        self.log_path = log_path
-        self.log_position = log_position
         self.current_zone = current_zone
         self.zone_timer = zone_timer
         self.toon_label.setText(f"Toon: {self.toon_name}")
         self.update_zone(current_zone, zone_timer)
 
-    def update_zone(self, current_zone, zone_timer):
+    def set_multi_toon(self, enabled):
+        self.multi_toon = enabled
+
+    def update_zone(self, current_zone, zone_timer, toon=None):
+        if toon is not None:
+            self.toon_zones[toon] = (current_zone, zone_timer)
+            if toon != self.toon_name:
+                return
         self.current_zone = current_zone
         self.zone_timer = zone_timer
-        zone_display = self.get_who_name(self.current_zone)
-        self.zone_label.setText(f"Zone: {zone_display} ({self.zone_timer // 60}:{self.zone_timer % 60:02d})")
-        self.time_input.setPlaceholderText(f"Custom Time (default: {self.zone_timer // 60}:{self.zone_timer % 60:02d})")
-
-    def get_who_name(self, zone_name):
-        # Reverse mapping from zone entry name to /who name
-        zone_to_who = {
-            "Northern Plains of Karana": "Northern Karana",
-            "Eastern Plains of Karana": "Eastern Karana",
-            "Western Plains of Karana": "Western Karana",
-            "East Commonlands": "Eastern Commonlands",
-            "West Commonlands": "Western Commonlands",
-            "Beholder's Maze": "Gorge of King Xorbb",
-            "Highpass Hold": "High Hold",
-            "Innothule Swamp": "Innothule",
-            "Kithicor Forest": "Kithicor",
-            "Lake Rathetear": "Rathetear",
-            "Northern Desert of Ro": "North Ro",
-            "Southern Desert of Ro": "South Ro",
-            "The Feerrott": "Feerrott",
-            "Everfrost Peaks": "Everfrost",
-            "Oasis of Marr": "Oasis",
-            "Clan Runnyeye": "Runnyeye",
-            "Nagafen's Lair": "Solusek B",
-            "Solusek's Eye": "Solusek A",
-            "Splitpaw Lair": "Splitpaw",
-            "The Temple of Solusek Ro": "Solusek Ro",
-            "Qeynos Catacombs": "Qeynos Sewers",
-            "Kerra Island": "Kerra Isle",
-            "Toxxulia Forest": "Toxxulia",
-            "The Warrens": "Warrens",
-            "Ak'Anon": "Ak`Anon",
-            "Kelethin": "Greater Faydark",
-            "Butcherblock Mountains": "Butcherblock",
-            "Kedge Keep": "Kedge",
-            "Mistmoore Castle": "Mistmoore",
-            "The Estate of Unrest": "Unrest",
-            "Burning Wood": "Burning Woods",
-            "The Overthere": "Overthere",
-            "Skyfire Mountains": "Skyfire",
-            "Howling Stones": "Charasis",
-            "Karnor's Castle": "Karnor",
-            "Kurn's Tower": "Kurn",
-            "Mines of Nurga": "Nurga",
-            "Old Sebilis": "Sebilis",
-            "Temple of Droga": "Droga",
-            "The Great Divide": "Great Divide",
-            "Iceclad Ocean": "Iceclad",
-            "Kael Drakkal": "Kael",
-            "Siren's Grotto": "Sirens",
-            "Tower of Frozen Shadow": "Frozen Shadow",
-            "Velketor's Labyrinth": "Velketor"
-        }
-        return zone_to_who.get(zone_name, zone_name)
+        zone_display = ZONES.who_name(self.current_zone)
+        self.zone_label.setText(f"Zone: {zone_display} ({format_remaining(self.zone_timer)})")
+        self.time_input.setPlaceholderText(f"Custom Time (default: {format_remaining(self.zone_timer)})")
 
     def showEvent(self, event):
         from main import MainApp  # Import here to avoid circular import
         main_app = QApplication.instance().property("MainApp")
         if main_app:
-            self.update_toon(main_app.toon_name, main_app.log_file, main_app.log_path, main_app.log_position, main_app.current_zone, main_app.zone_timer)
-        if not self.poll_timer.isActive():
-            self.poll_timer.start(1000)
-        if not self.toon_check_timer.isActive():
-            self.toon_check_timer.start(3000)
+            self.toon_zones.update(main_app.toon_zones)
+            self.multi_toon = main_app.multi_toon
+            self.update_toon(main_app.toon_name, main_app.current_zone, main_app.zone_timer)
+            main_app.log_bus.subscribe(self.LOG_EVENT_KINDS, self.handle_log_event)
         super().showEvent(event)
+        # Rows are not repainted while hidden
+        self.refresh_timers()
 
     def setup_ui(self):
         self.resize(280, 400)
@@ -114,175 +114,325 @@ class MobTimerApp(QWidget):
         self.toon_label = QLabel(f"Toon: {self.toon_name}")
         self.toon_label.setStyleSheet("font-weight: bold; font-size: 12px;")
         main_layout.addWidget(self.toon_label)
-        self.zone_label = QLabel(f"Current Zone: {self.get_who_name(self.current_zone)} ({self.zone_timer // 60}:{self.zone_timer % 60:02d})")
+        self.zone_label = QLabel(f"Current Zone: {ZONES.who_name(self.current_zone)} ({format_remaining(self.zone_timer)})")
         self.zone_label.setStyleSheet("font-weight: bold; font-size: 12px;")
         main_layout.addWidget(self.zone_label)
         self.time_input = QLineEdit()
-        self.time_input.setPlaceholderText(f"Zone Respawn Time (default: {self.zone_timer // 60}:{self.zone_timer % 60:02d})")
+        self.time_input.setPlaceholderText(f"Zone Respawn Time (default: {format_remaining(self.zone_timer)})")
         main_layout.addWidget(self.time_input)
-        scroll = QScrollArea()
-        scroll.setWidgetResizable(True)
-        self.content = QWidget()
-        self.timer_layout = QVBoxLayout(self.content)
-        self.timer_layout.setAlignment(Qt.AlignmentFlag.AlignTop)
-        scroll.setWidget(self.content)
-        main_layout.addWidget(scroll)
+        self.filter_input = QLineEdit()
+        self.filter_input.setPlaceholderText("Filter mobs (e.g., gnoll)")
+        main_layout.addWidget(self.filter_input)
+        # The model keeps timers sorted by deadline (so by time left); the
+        # proxy only filters
+        self.filtered_timers = QSortFilterProxyModel(self)
+        self.filtered_timers.setSourceModel(self.timers)
+        self.filtered_timers.setFilterRole(TimerListModel.NameRole)
+        self.filtered_timers.setFilterCaseSensitivity(Qt.CaseSensitivity.CaseInsensitive)
+        self.filter_input.textChanged.connect(self.filtered_timers.setFilterFixedString)
+        self.timer_view = QListView()
+        self.timer_view.setModel(self.filtered_timers)
+        self.timer_view.setItemDelegate(TimerDelegate(self.timer_view))
+        self.timer_view.setUniformItemSizes(True)
+        self.timer_view.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.timer_view.setStyleSheet("QListView { background-color: #101010; }")
+        self.timer_view.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
+        self.timer_view.customContextMenuRequested.connect(self.show_context_menu)
+        self.timer_view.doubleClicked.connect(
+            lambda index: self.remove_timer(index.data(TimerListModel.KeyRole)))
+        main_layout.addWidget(self.timer_view)
         self.setLayout(main_layout)
-        self.timer_style = """
-        QLabel {
-            font-family: Monospace;
-            font-size: 14px;
-            padding: 4px 8px;
-            margin: 0px;
-            border: 1px solid #2a2a2a;
-            background-color: #1a1a1a;
-            color: #e0e0e0;
-            min-width: 250px;
-        }
-        """
-
-    def check_for_new_toon(self):
-        try:
-            if not os.path.exists(self.log_dir):
-                print(f"Log directory {self.log_dir} does not exist")
-                return
-            os.chdir(self.log_dir)
-            log_files = [f for f in os.listdir() if f.startswith("eqlog_")]
-            if not log_files:
-                print(f"No log files found in {self.log_dir}")
-                return
-            log_files = sorted(log_files, key=lambda f: os.stat(f).st_mtime, reverse=True)
-            latest_file = log_files[0]
-            if latest_file != self.log_path:
-                self.log_path = latest_file
-                self.toon_name = latest_file.split("_")[1]
-                self.toon_label.setText(f"Toon: {self.toon_name}")
-                if self.log_file:
-                    self.log_file.close()
-                self.log_file = open(latest_file, "r")
-                self.log_file.seek(0, os.SEEK_END)
-                self.log_position = self.log_file.tell()
-        except Exception as e:
-            print(f"Error checking for new toon: {e}")
-
-    def check_new_log_lines(self):
-        if not self.log_file or not os.path.exists(self.log_path):
+
+    def handle_log_event(self, event):
+        if event.kind == EVENT_SLAIN:
+            self.add_kill(event.data, event.timestamp, event.toon)
+        elif event.kind == EVENT_TOON:
+            current_zone, zone_timer = self.toon_zones.get(
+                event.data[0], ("Unknown", 400))
+            self.update_toon(event.data[0], current_zone, zone_timer)
+
+    def add_kill(self, mob_name, killed_at, toon=None):
+        # Keyed by the kill's log time and toon, so a kill read again after a
+        # crash (logs resume from a checkpoint older than the snapshot) finds
+        # the timer restored for it; the count tells kills in one second apart
+        second = int(killed_at)
+        last = self.kill_counts.get((mob_name, toon))
+        count = last[1] + 1 if last and last[0] == second else 1
+        self.kill_counts[(mob_name, toon)] = (second, count)
+        mob_key = f"{mob_name}_{second}_{toon or ''}#{count}"
+        if mob_key in self.timers.deadlines:
             return
-        try:
-            self.log_file.seek(self.log_position)
-            new_lines = self.log_file.readlines()
-            self.log_position = self.log_file.tell()
-            for line in new_lines:
-                clean_line = re.sub(r'^\[.*?\]\s', '', line.strip())
-                if clean_line:
-                    self.process_log_line(clean_line)
-        except Exception as e:
-            print(f"Error reading log lines: {e}")
-
-    def process_log_line(self, line):
-        mob_name = None
-        if ("has been slain by" in line or "You have slain" in line):
-            try:
-                mob_name = (
-                    re.search(r"You have slain (.+?)!", line).group(1)
-                    if "You have slain" in line
-                    else re.search(r"(.+?) has been slain by", line).group(1)
-                ).strip()
-            except AttributeError:
-                return
-            mob_key = f"{mob_name}_{int(time() * 1000)}"
-            user_time = self.time_input.text().strip()
-            if re.match(r"^\d+:\d{2}$", user_time):
-                try:
-                    m, s = map(int, user_time.split(":"))
-                    seconds = m * 60 + s
-                except ValueError:
-                    seconds = self.zone_timer
-            else:
-                seconds = self.zone_timer
-            self.start_timer(mob_key, mob_name, seconds)
-
-    def start_timer(self, mob_key: str, mob_name: str, seconds: int):
-        print(f"Starting timer for {mob_key} ({mob_name}, {seconds}s)")
-        label = ColorTimerLabel(f"{mob_name} - {seconds // 60}:{seconds % 60:02d}", mob_key)
-        label.setStyleSheet(self.timer_style)
-        label.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.timer_layout.addWidget(label)
-        timer = QTimer(self)
-        timer.timeout.connect(lambda: self.update_timer(mob_key))
-        timer.start(1000)
-        self.timers[mob_key] = [label, seconds, timer, mob_name]
-        label.double_clicked.connect(lambda: self.remove_timer(mob_key))
-
-    def update_timer(self, mob_key):
-        if mob_key not in self.timers:
-            print(f"Timer {mob_key} not found in update_timer")
+        user_time = self.time_input.text().strip()
+        if re.match(r"^(\d+:)?\d+:\d{2}$", user_time):
+            seconds = 0
+            for part in user_time.split(":"):
+                seconds = seconds * 60 + int(part)
+        else:
+            zone = self.toon_zones.get(toon, (self.current_zone,))[0]
+            # Per-mob times (e.g. guards vs goblins) override the zone's
+            seconds = ZONES.respawn(zone, mob_name)
+            learned = self.kill_history.suggest(zone, mob_name) if self.kill_history else None
+            if learned:
+                seconds, low, high = learned
+                mob_name = f"{mob_name} (~{format_remaining(seconds)} ±{format_remaining((high - low) / 2)})"
+        # Count from the kill's log time so late-read lines are aged correctly
+        ends_at = killed_at + seconds
+        if ends_at <= time():
             return
-        label, seconds, timer, mob_name = self.timers[mob_key]
-        seconds -= 1
-        if seconds <= 0:
-            print(f"Timer {mob_key} expired")
-            timer.stop()
-            timer.timeout.disconnect()
-            label.deleteLater()
-            del self.timers[mob_key]
+        if self.multi_toon and toon:
+            # Several toons share the list, so tag whose kill it was
+            mob_name = f"[{toon}] {mob_name}"
+        self.start_timer(mob_key, mob_name, ends_at)
+
+    def start_timer(self, mob_key: str, mob_name: str, ends_at: float, color=None):
+        # ends_at is an epoch time; the scheduler turns it into a monotonic
+        # deadline and the row is drawn from what is left of it
+        deadline = self.scheduler.at_epoch(ends_at)
+        print(f"Starting timer for {mob_key} ({mob_name}, {math.ceil(deadline - self.scheduler.now())}s)")
+        self.timers.add_timer(mob_key, mob_name, deadline, color or TIMER_COLORS["Default"])
+        self.scheduler.schedule(mob_key, deadline, self.expire_timer)
+        self.schedule_spawn_warnings(mob_key)
+
+    def mob_of(self, mob_key):
+        # Keys are "<mob name>_<log second>_<toon>#<count>", so the mob
+        # survives any tag added to the shown name
+        return mob_key.rsplit("_", 2)[0]
+
+    def spawn_warnings(self, mob_key):
+        """Scheduler entries for the timer's spawn warnings still to come.
+        Each is keyed (mob_key, offset) and fires once, so timers cost
+        nothing between warnings."""
+        row = self.timers.row_of(mob_key)
+        if row is None or not self.warning_offsets:
+            return []
+        deadline, _, _, color = self.timers.rows[row]
+        if (normalize_name(self.mob_of(mob_key)) not in self.warning_mobs
+                and COLOR_NAMES.get(color) not in self.warning_colors):
+            return []
+        now = self.scheduler.now()
+        return [((mob_key, offset), deadline - offset, self.warn_spawn)
+                for offset in self.warning_offsets if deadline - offset > now]
+
+    def schedule_spawn_warnings(self, mob_key):
+        for warning_key, deadline, callback in self.spawn_warnings(mob_key):
+            self.scheduler.schedule(warning_key, deadline, callback)
+
+    def cancel_spawn_warnings(self, mob_key):
+        for offset in self.warning_offsets:
+            self.scheduler.cancel((mob_key, offset))
+
+    def update_spawn_warnings(self):
+        for _, mob_key, _, _ in self.timers.rows:
+            self.cancel_spawn_warnings(mob_key)
+        self.scheduler.schedule_many(
+            entry for _, mob_key, _, _ in self.timers.rows
+            for entry in self.spawn_warnings(mob_key))
+
+    def warn_spawn(self, warning_key):
+        mob_key, offset = warning_key
+        print(f"Spawn warning for {mob_key}: {offset}s")
+        self.spawn_warning.emit(self.mob_of(mob_key), offset)
+
+    def toggle_mob_warning(self, mob_key, enabled):
+        mob = normalize_name(self.mob_of(mob_key))
+        if enabled:
+            self.warning_mobs.add(mob)
+        else:
+            self.warning_mobs.discard(mob)
+        self.save_spawn_warnings()
+        self.update_spawn_warnings()
+
+    def toggle_color_warning(self, color_name, enabled):
+        if enabled:
+            self.warning_colors.add(color_name)
         else:
-            mins, secs = divmod(seconds, 60)
-            label.setText(f"{mob_name} - {mins}:{secs:02d}")
-            self.timers[mob_key][1] = seconds
+            self.warning_colors.discard(color_name)
+        self.save_spawn_warnings()
+        self.update_spawn_warnings()
+
+    def set_timer_color(self, mob_key, color):
+        self.timers.set_color(mob_key, color)
+        self.cancel_spawn_warnings(mob_key)
+        self.schedule_spawn_warnings(mob_key)
+
+    def snapshot_timers(self):
+        return [[mob_key, mob_name, self.scheduler.to_epoch(deadline), color]
+                for deadline, mob_key, mob_name, color in self.timers.rows]
+
+    def restore_timers(self, timers):
+        # Loaded in one go: a session can hold hundreds of timers
+        now = time()
+        rows = [[self.scheduler.at_epoch(ends_at), mob_key, mob_name, color]
+                for mob_key, mob_name, ends_at, color in timers
+                if ends_at > now and mob_key not in self.timers.deadlines]
+        self.timers.add_timers(rows)
+        self.scheduler.schedule_many(
+            (mob_key, deadline, self.expire_timer) for deadline, mob_key, _, _ in rows)
+        self.scheduler.schedule_many(
+            entry for _, mob_key, _, _ in rows for entry in self.spawn_warnings(mob_key))
+        print(f"Restored {len(rows)} timers")
+
+    def refresh_timers(self):
+        # Only the visible rows are painted, whatever the number of timers
+        if self.isVisible():
+            self.timer_view.viewport().update()
+
+    def expire_timer(self, mob_key):
+        if self.timers.remove_timer(mob_key):
+            print(f"Timer {mob_key} expired")
 
     def remove_timer(self, mob_key):
-        if mob_key in self.timers:
+        if self.timers.remove_timer(mob_key):
             print(f"Removing timer {mob_key}")
-            label, _, timer, _ = self.timers[mob_key]
-            timer.stop()
-            timer.timeout.disconnect()
-            label.deleteLater()
-            del self.timers[mob_key]
+            self.scheduler.cancel(mob_key)
+            self.cancel_spawn_warnings(mob_key)
+
+    def show_context_menu(self, pos):
+        index = self.timer_view.indexAt(pos)
+        if not index.isValid():
+            return
+        mob_key = index.data(TimerListModel.KeyRole)
+        menu = QMenu()
+        for name, color in TIMER_COLORS.items():
+            action = QAction(name, self)
+            action.triggered.connect(
+                lambda checked, c=color: self.set_timer_color(mob_key, c))
+            menu.addAction(action)
+        menu.addSeparator()
+        warn_mob = QAction(f"Warn Before {self.mob_of(mob_key)} Spawns", self)
+        warn_mob.setCheckable(True)
+        warn_mob.setChecked(normalize_name(self.mob_of(mob_key)) in self.warning_mobs)
+        warn_mob.toggled.connect(lambda checked: self.toggle_mob_warning(mob_key, checked))
+        menu.addAction(warn_mob)
+        color_name = COLOR_NAMES.get(self.timers.rows[self.timers.row_of(mob_key)][3])
+        if color_name and color_name != "Default":
+            warn_color = QAction(f"Warn Before {color_name} Timers Spawn", self)
+            warn_color.setCheckable(True)
+            warn_color.setChecked(color_name in self.warning_colors)
+            warn_color.toggled.connect(
+                lambda checked: self.toggle_color_warning(color_name, checked))
+            menu.addAction(warn_color)
+        menu.exec(self.timer_view.viewport().mapToGlobal(pos))
 
     def closeEvent(self, event):
-        self.poll_timer.stop()
-        self.toon_check_timer.stop()
+        main_app = QApplication.instance().property("MainApp")
+        if main_app:
+            main_app.log_bus.unsubscribe(self.handle_log_event)
         self.hide()
         event.accept()
 
-class ColorTimerLabel(QLabel):
-    double_clicked = pyqtSignal()
-    def __init__(self, text, mob_key):
-        super().__init__(text)
-        self.mob_key = mob_key
-        self.style_base = """
-            font-family: Monospace;
-            font-size: 14px;
-            padding: 4px 8px;
-            margin: 0px;
-            border: 1px solid #2a2a2a;
-            color: #e0e0e0;
-        """
-        self.setStyleSheet(f"{self.style_base} background-color: #1a1a1a;")
-        self.setAlignment(Qt.AlignmentFlag.AlignCenter)
-        self.setContextMenuPolicy(Qt.ContextMenuPolicy.CustomContextMenu)
-        self.customContextMenuRequested.connect(self.show_context_menu)
-
-    def mouseDoubleClickEvent(self, event):
-        if event.button() == Qt.MouseButton.LeftButton:
-            self.double_clicked.emit()
-        super().mouseDoubleClickEvent(event)
+# Row background colors offered in the context menu
+TIMER_COLORS = {
+    "Default": "#1a1a1a",
+    "Green": "#145214",
+    "Blue": "#143052",
+    "Red": "#521414",
+    "Purple": "#361452"
+}
+COLOR_NAMES = {color: name for name, color in TIMER_COLORS.items()}
 
-    def show_context_menu(self, pos):
-        menu = QMenu()
-        colors = {
-            "Default": "#1a1a1a",
-            "Green": "#145214",
-            "Blue": "#143052",
-            "Red": "#521414",
-            "Purple": "#361452"
-        }
-        for name, color in colors.items():
-            action = QAction(name, self)
-            action.triggered.connect(lambda checked, c=color: self.set_background_color(c))
-            menu.addAction(action)
-        menu.exec(self.mapToGlobal(pos))
 
-    def set_background_color(self, color):
-        self.setStyleSheet(f"{self.style_base} background-color: {color};")
+class TimerListModel(QAbstractListModel):
+    """Running mob timers, ordered by deadline (soonest to respawn first).
+
+    Rows hold no text: the remaining time is computed from the deadline
+    when a row is painted, so nothing changes in the model per tick.
+    """
+    KeyRole = Qt.ItemDataRole.UserRole
+    NameRole = Qt.ItemDataRole.UserRole + 1
+
+    def __init__(self, scheduler, parent=None):
+        super().__init__(parent)
+        self.scheduler = scheduler
+        self.rows = []  # [[deadline, mob_key, mob_name, color]], sorted
+        self.deadlines = {}  # {mob_key: deadline}
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.rows)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        deadline, mob_key, mob_name, color = self.rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            seconds = math.ceil(max(0.0, deadline - self.scheduler.now()))
+            return f"{mob_name} - {format_remaining(seconds)}"
+        if role == Qt.ItemDataRole.BackgroundRole:
+            return QColor(color)
+        if role == self.KeyRole:
+            return mob_key
+        if role == self.NameRole:
+            return mob_name
+        return None
+
+    def row_of(self, mob_key):
+        deadline = self.deadlines.get(mob_key)
+        if deadline is None:
+            return None
+        row = bisect.bisect_left(self.rows, deadline, key=lambda entry: entry[0])
+        while self.rows[row][1] != mob_key:
+            row += 1
+        return row
+
+    def add_timer(self, mob_key, mob_name, deadline, color=TIMER_COLORS["Default"]):
+        row = bisect.bisect_right(self.rows, deadline, key=lambda entry: entry[0])
+        self.beginInsertRows(QModelIndex(), row, row)
+        self.rows.insert(row, [deadline, mob_key, mob_name, color])
+        self.deadlines[mob_key] = deadline
+        self.endInsertRows()
+
+    def add_timers(self, rows):
+        """Add many [deadline, mob_key, mob_name, color] rows at once."""
+        if not rows:
+            return
+        self.beginResetModel()
+        self.rows.extend(rows)
+        self.rows.sort(key=lambda entry: entry[0])
+        self.deadlines.update((mob_key, deadline) for deadline, mob_key, _, _ in rows)
+        self.endResetModel()
+
+    def remove_timer(self, mob_key):
+        row = self.row_of(mob_key)
+        if row is None:
+            return False
+        self.beginRemoveRows(QModelIndex(), row, row)
+        del self.rows[row]
+        del self.deadlines[mob_key]
+        self.endRemoveRows()
+        return True
+
+    def set_color(self, mob_key, color):
+        row = self.row_of(mob_key)
+        if row is not None:
+            self.rows[row][3] = color
+            index = self.index(row)
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.BackgroundRole])
+
+
+class TimerDelegate(QStyledItemDelegate):
+    """Paints a timer row: colored box, border and centered countdown."""
+    ROW_HEIGHT = 28
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.font = QFont("Monospace")
+        self.font.setStyleHint(QFont.StyleHint.Monospace)
+        self.font.setPixelSize(14)
+        self.border = QPen(QColor("#2a2a2a"))
+        self.text_color = QColor("#e0e0e0")
+
+    def paint(self, painter, option, index):
+        painter.save()
+        rect = option.rect.adjusted(0, 0, -1, -1)
+        painter.fillRect(rect, index.data(Qt.ItemDataRole.BackgroundRole))
+        painter.setPen(self.border)
+        painter.drawRect(rect)
+        if option.state & QStyle.StateFlag.State_Selected:
+            painter.fillRect(rect, QColor(255, 255, 255, 30))
+        painter.setFont(self.font)
+        painter.setPen(self.text_color)
+        painter.drawText(rect, Qt.AlignmentFlag.AlignCenter, index.data())
+        painter.restore()
+
+    def sizeHint(self, option, index):
+        return QSize(250, self.ROW_HEIGHT)
@@ -0,0 +1,153 @@
+import heapq
+import itertools
+import math
+import time
+from PyQt6.QtCore import QObject, QTimer, Qt, pyqtSignal
+
+# Running countdowns are redrawn once per wall-clock second, this long
+# (milliseconds) after the second turns over
+TICK_OFFSET_MS = 5
+# QTimer intervals are a signed 32-bit count of milliseconds
+MAX_TIMER_MS = 2 ** 31 - 1
+
+
+def timer_clock():
+    """Monotonic seconds that keep counting while the machine is suspended
+    (CLOCK_BOOTTIME), so respawn deadlines stay right across a suspend;
+    plain time.monotonic() where that clock is unavailable."""
+    try:
+        return time.clock_gettime(time.CLOCK_BOOTTIME)
+    except (AttributeError, OSError):
+        return time.monotonic()
+
+
+def format_remaining(seconds):
+    """m:ss, or h:mm:ss from an hour up (respawns run up to days)."""
+    hours, rest = divmod(int(seconds), 3600)
+    mins, secs = divmod(rest, 60)
+    return f"{hours}:{mins:02d}:{secs:02d}" if hours else f"{mins}:{secs:02d}"
+
+
+class TimerScheduler(QObject):
+    """Deadlines of every running countdown, kept in one min-heap.
+
+    Mob respawn timers and overlay bars share it instead of running a QTimer
+    each: a single-shot timer is armed for the earliest deadline only and
+    fires the callbacks of whatever is due, and one `tick` per second lets
+    views redraw the countdowns they actually show. Cancelled entries stay
+    in the heap until they reach the top.
+
+    Deadlines are absolute timer_clock() times and views compute what is
+    left when they draw, so a stalled event loop never makes a timer drift.
+    Deadlines taken from log times fall on whole wall-clock seconds and the
+    tick is aligned to them, so the shown seconds change on time.
+    """
+    tick = pyqtSignal()
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.heap = []  # [(deadline, sequence, key)]
+        self.entries = {}  # {key: (deadline, callback)}
+        self.sequence = itertools.count()
+        self.expiry_timer = QTimer(self)
+        self.expiry_timer.setSingleShot(True)
+        self.expiry_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.expiry_timer.timeout.connect(self.fire_due)
+        self.tick_timer = QTimer(self)
+        self.tick_timer.setSingleShot(True)
+        self.tick_timer.setTimerType(Qt.TimerType.PreciseTimer)
+        self.tick_timer.timeout.connect(self.on_tick)
+
+    def now(self):
+        return timer_clock()
+
+    def at_epoch(self, epoch_time):
+        """The deadline for an epoch (time.time()) moment."""
+        return self.now() + (epoch_time - time.time())
+
+    def to_epoch(self, deadline):
+        """The epoch time of a deadline, e.g. to save it across restarts."""
+        return time.time() + (deadline - self.now())
+
+    def start_tick(self):
+        self.tick_timer.start(
+            1000 - int(time.time() % 1 * 1000) + TICK_OFFSET_MS)
+
+    def on_tick(self):
+        # The expiry timer may have slept through a suspend; catch up here
+        if self.heap and self.heap[0][0] <= self.now():
+            self.fire_due()
+        if self.entries:
+            self.start_tick()
+        self.tick.emit()
+
+    def schedule(self, key, deadline, callback):
+        """Call callback(key) once `deadline` (a now() time) has passed.
+        Scheduling a key again replaces its deadline."""
+        self.entries[key] = (deadline, callback)
+        heapq.heappush(self.heap, (deadline, next(self.sequence), key))
+        if len(self.heap) > 2 * len(self.entries) + 64:
+            self.compact()
+        self.arm()
+        if not self.tick_timer.isActive():
+            self.start_tick()
+
+    def schedule_many(self, entries):
+        """schedule() for many (key, deadline, callback) at once, e.g. when
+        restoring a session; the heap is rebuilt and armed once."""
+        entries = list(entries)
+        if not entries:
+            return
+        for key, deadline, callback in entries:
+            self.entries[key] = (deadline, callback)
+            self.heap.append((deadline, next(self.sequence), key))
+        self.compact()
+        self.arm()
+        if self.entries and not self.tick_timer.isActive():
+            self.start_tick()
+
+    def cancel(self, key):
+        if self.entries.pop(key, None) is not None and not self.entries:
+            self.heap.clear()
+            self.arm()
+
+    def deadline(self, key):
+        entry = self.entries.get(key)
+        return entry[0] if entry else None
+
+    def remaining(self, key):
+        """Seconds until the key's deadline (0 when due or unknown)."""
+        deadline = self.deadline(key)
+        return max(0.0, deadline - self.now()) if deadline is not None else 0.0
+
+    def compact(self):
+        self.heap = [(deadline, sequence, key) for deadline, sequence, key in self.heap
+                     if self.entries.get(key, (None,))[0] == deadline]
+        heapq.heapify(self.heap)
+
+    def arm(self):
+        # Drop cancelled and rescheduled entries off the top first
+        while self.heap:
+            deadline, _, key = self.heap[0]
+            if self.entries.get(key, (None,))[0] == deadline:
+                break
+            heapq.heappop(self.heap)
+        if not self.heap:
+            self.expiry_timer.stop()
+            self.tick_timer.stop()
+            return
+        delay = math.ceil((self.heap[0][0] - self.now()) * 1000)
+        self.expiry_timer.start(min(max(0, delay), MAX_TIMER_MS))
+
+    def fire_due(self):
+        now = self.now()
+        due = []
+        while self.heap and self.heap[0][0] <= now:
+            deadline, _, key = heapq.heappop(self.heap)
+            entry = self.entries.get(key)
+            if entry and entry[0] == deadline:
+                del self.entries[key]
+                due.append((key, entry[1]))
+        for key, callback in due:
+            callback(key)
+        self.arm()
@@ -0,0 +1,527 @@
+import re
+import time
+from collections import deque
+from log_reader import decode_line
+try:
+    from re import _parser as sre_parse
+except ImportError:  # Python < 3.11
+    import sre_parse
+
+# Trigger patterns starting with this are regular expressions
+REGEX_PREFIX = "re:"
+# A regex's required literal must be at least this long to prefilter it
+MIN_PREFILTER_LITERAL = 3
+DIGITS = frozenset(b"0123456789")
+# Placeholders in trigger messages, filled from regex captures: {name} or {1}
+PLACEHOLDER_RE = re.compile(r"\{(\w+)\}")
+# Numbered backreferences would change meaning inside a combined pattern
+NUMBERED_GROUP_REF_RE = re.compile(rb"\\[1-9]|\(\?\([0-9]")
+# Regexes only see this much of a line, which bounds the cost of a search
+MAX_REGEX_LINE_BYTES = 1024
+# A regex search taking longer than this (seconds) disables its trigger
+REGEX_TIME_BUDGET = 0.02
+MAX_REPEAT = sre_parse.MAXREPEAT
+REPEATS = (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) + (
+    (sre_parse.POSSESSIVE_REPEAT,) if hasattr(sre_parse, "POSSESSIVE_REPEAT") else ())
+ALL_BYTES = frozenset(range(256))
+# What the character classes match in a bytes pattern
+CATEGORY_BYTES = {
+    sre_parse.CATEGORY_DIGIT: frozenset(b"0123456789"),
+    sre_parse.CATEGORY_SPACE: frozenset(b" \t\n\r\f\v"),
+    sre_parse.CATEGORY_WORD: frozenset(
+        b"abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789_"),
+}
+for _category, _negated in ((sre_parse.CATEGORY_DIGIT, sre_parse.CATEGORY_NOT_DIGIT),
+                            (sre_parse.CATEGORY_SPACE, sre_parse.CATEGORY_NOT_SPACE),
+                            (sre_parse.CATEGORY_WORD, sre_parse.CATEGORY_NOT_WORD)):
+    CATEGORY_BYTES[_negated] = ALL_BYTES - CATEGORY_BYTES[_category]
+
+
+def is_regex_trigger(pattern):
+    return pattern.startswith(REGEX_PREFIX)
+
+
+def compile_trigger_regex(pattern):
+    """Compile a "re:..." trigger pattern for matching raw line bytes;
+    raises re.error if it is invalid."""
+    return re.compile(pattern[len(REGEX_PREFIX):].encode())
+
+
+def check_trigger_pattern(pattern):
+    """Return why a trigger pattern cannot be used, or None if it is fine."""
+    if is_regex_trigger(pattern):
+        try:
+            regex = compile_trigger_regex(pattern)
+        except re.error as e:
+            return f"Invalid regular expression: {e}"
+        return backtracking_risk(regex)
+    return None
+
+
+def backtracking_risk(regex):
+    """Return why a regex may take exponential time on a long line, or None.
+
+    Python's re backtracks, so the constructs that can make a search blow
+    up are rejected: backreferences, a variable-length repeat nested in a
+    repeat of more than one, e.g. (\\w+\\s?)+ or (\\w+ ){0,30}, and
+    overlapping alternatives in such a repeat, e.g. (a|ab)*.
+    """
+    items = sre_parse.parse(regex.pattern, regex.flags)
+    risk = _backtracking_risk(items, False)
+    if risk:
+        return risk
+    if _overlapping_repeats(items, [], True, regex.flags & re.IGNORECASE)[0]:
+        return ("Repeats in a row that can match the same characters, like "
+                ".*x.*y, can take polynomial time; use narrower classes such as "
+                "\\w+ or [^,]+ between the fixed text.")
+    return None
+
+
+def _backtracking_risk(items, in_repeat):
+    for op, arg in items:
+        if op in (sre_parse.GROUPREF, sre_parse.GROUPREF_EXISTS):
+            return "Backreferences are not allowed in trigger patterns."
+        if op in REPEATS:
+            low, high, body = arg
+            # Bounded repeats count too: (\w+ ?){1,50} backtracks through
+            # as many splits of the line as (\w+ ?)+ does
+            if in_repeat and low != high:
+                return ("Nested repeats like (a+)+ can take exponential time; "
+                        "rewrite the pattern without them.")
+            risk = _backtracking_risk(body, in_repeat or high > 1)
+        elif op is sre_parse.BRANCH:
+            # Repeated alternatives that can match the same text, like
+            # (a|aa)*, backtrack exponentially too; they must start with
+            # distinct literals
+            firsts = [branch[0][1] if branch and branch[0][0] is sre_parse.LITERAL else None
+                      for branch in arg[1]]
+            if in_repeat and (None in firsts or len(set(firsts)) < len(firsts)):
+                return ("Repeated alternatives must start with different "
+                        "characters, e.g. (ab|cd)* rather than (a|ab)*.")
+            risk = next(filter(None, (
+                _backtracking_risk(branch, in_repeat) for branch in arg[1])), None)
+        elif op is sre_parse.SUBPATTERN:
+            risk = _backtracking_risk(arg[-1], in_repeat)
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT) or op is getattr(
+                sre_parse, "ATOMIC_GROUP", None):
+            risk = _backtracking_risk(arg[-1], in_repeat)
+        else:
+            risk = None
+        if risk:
+            return risk
+    return None
+
+
+def _overlapping_repeats(items, live, tail_infallible, ignore_case):
+    """Look for an unbounded repeat that can take over characters from an
+    earlier one still able to grow ("live"), when something after it can
+    still fail and force both to be backtracked through. Returns (found,
+    live) where live lists the byte sets of the live repeats."""
+    for index, (op, arg) in enumerate(items):
+        rest_infallible = tail_infallible and all(
+            _infallible(item) for item in items[index + 1:])
+        if op in REPEATS:
+            low, high, body = arg
+            if high == MAX_REPEAT:
+                chars = _item_bytes(body, ignore_case)
+                if not rest_infallible and any(chars & other for other in live):
+                    return True, live
+                if low:
+                    live = [other for other in live if other & chars]
+                live = live + [chars]
+            else:
+                # A repeat that may stop early (optional items such as " ?"
+                # included) leaves every repeat live that was live after any
+                # number of rounds it may stop at
+                ends = [live] if low == 0 else []
+                for rounds in range(1, min(high, 2) + 1):
+                    found, live = _overlapping_repeats(body, live, rest_infallible, ignore_case)
+                    if found:
+                        return True, live
+                    if rounds >= low:
+                        ends.append(live)
+                live = [] if ends else live
+                for end in ends:
+                    live.extend(chars for chars in end if chars not in live)
+        elif op in (sre_parse.SUBPATTERN, getattr(sre_parse, "ATOMIC_GROUP", None)):
+            found, live = _overlapping_repeats(arg[-1], live, rest_infallible, ignore_case)
+            if found:
+                return True, live
+        elif op is sre_parse.BRANCH:
+            branch_live = []
+            for branch in arg[1]:
+                found, after = _overlapping_repeats(branch, live, rest_infallible, ignore_case)
+                if found:
+                    return True, live
+                branch_live.extend(chars for chars in after if chars not in branch_live)
+            live = branch_live
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            if _overlapping_repeats(arg[-1], [], False, ignore_case)[0]:
+                return True, live
+        elif op is not sre_parse.AT:
+            # One character: only the repeats that could also match it can
+            # still be growing past it
+            chars = _item_bytes([(op, arg)], ignore_case)
+            live = [other for other in live if other & chars]
+    return False, live
+
+
+def _infallible(item):
+    # Whether an item always matches wherever a line has been read to
+    op, arg = item
+    if op in REPEATS:
+        return arg[0] == 0
+    if op is sre_parse.SUBPATTERN:
+        return all(_infallible(inner) for inner in arg[-1])
+    return op is sre_parse.AT and arg in (sre_parse.AT_END, sre_parse.AT_END_STRING)
+
+
+def _anchored_at_end(items):
+    # Whether any of the parsed items is a $ or \Z, which the search's
+    # endpos makes match at the cap of a longer line
+    for op, arg in items:
+        if op is sre_parse.AT and arg in (sre_parse.AT_END, sre_parse.AT_END_STRING):
+            return True
+        if op in REPEATS:
+            inner = [arg[2]]
+        elif op in (sre_parse.SUBPATTERN, getattr(sre_parse, "ATOMIC_GROUP", None)):
+            inner = [arg[-1]]
+        elif op is sre_parse.BRANCH:
+            inner = arg[1]
+        elif op in (sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            inner = [arg[1]]
+        elif op is sre_parse.GROUPREF_EXISTS:
+            inner = [branch for branch in arg[1:] if branch]
+        else:
+            continue
+        if any(_anchored_at_end(branch) for branch in inner):
+            return True
+    return False
+
+
+def _item_bytes(items, ignore_case):
+    """The set of bytes the parsed items may consume."""
+    chars = set()
+    for op, arg in items:
+        if op is sre_parse.LITERAL:
+            chars.add(arg)
+        elif op is sre_parse.NOT_LITERAL or op is sre_parse.ANY:
+            chars |= ALL_BYTES - {arg if op is sre_parse.NOT_LITERAL else ord("\n")}
+        elif op is sre_parse.IN:
+            members = set()
+            for member_op, member in arg:
+                if member_op is sre_parse.LITERAL:
+                    members.add(member)
+                elif member_op is sre_parse.RANGE:
+                    members.update(range(member[0], member[1] + 1))
+                elif member_op is sre_parse.CATEGORY:
+                    members |= CATEGORY_BYTES.get(member, ALL_BYTES)
+                elif member_op is not sre_parse.NEGATE:
+                    members |= ALL_BYTES
+            chars |= ALL_BYTES - members if arg and arg[0][0] is sre_parse.NEGATE else members
+        elif op in REPEATS:
+            chars |= _item_bytes(arg[2], ignore_case)
+        elif op in (sre_parse.SUBPATTERN, getattr(sre_parse, "ATOMIC_GROUP", None)):
+            chars |= _item_bytes(arg[-1], ignore_case)
+        elif op is sre_parse.BRANCH:
+            for branch in arg[1]:
+                chars |= _item_bytes(branch, ignore_case)
+        elif op not in (sre_parse.AT, sre_parse.ASSERT, sre_parse.ASSERT_NOT):
+            chars |= ALL_BYTES
+    if ignore_case:
+        chars |= {ord(chr(c).swapcase()) for c in chars if chr(c).isascii() and chr(c).isalpha()}
+    return frozenset(chars)
+
+
+def required_literal(regex):
+    """The longest run of literal bytes every match of `regex` contains, or
+    b"" when there is none (or the regex ignores case)."""
+    if regex.flags & re.IGNORECASE:
+        return b""
+    return _longest_literal(sre_parse.parse(regex.pattern, regex.flags))
+
+
+def _longest_literal(items):
+    best = b""
+    run = bytearray()
+    for op, arg in items:
+        if op is sre_parse.LITERAL:
+            run.append(arg)
+            continue
+        if len(run) > len(best):
+            best = bytes(run)
+        run = bytearray()
+        inner = b""
+        if op is sre_parse.SUBPATTERN and not arg[1] & sre_parse.SRE_FLAG_IGNORECASE:
+            inner = _longest_literal(arg[-1])
+        elif op in (sre_parse.MAX_REPEAT, sre_parse.MIN_REPEAT) and arg[0] >= 1:
+            inner = _longest_literal(arg[2])
+        if len(inner) > len(best):
+            best = inner
+    return bytes(run) if len(run) > len(best) else best
+
+
+def combine_regexes(regexes):
+    """Fold regexes into as few alternations as possible, returning
+    (combined, [member, ...]) pairs. Members whose group names clash, or
+    that use numbered group references, go into separate alternations."""
+    groups = []
+    for regex in regexes:
+        if NUMBERED_GROUP_REF_RE.search(regex.pattern):
+            groups.append([regex])
+            continue
+        for members in groups:
+            if not NUMBERED_GROUP_REF_RE.search(members[0].pattern) and not any(
+                    set(regex.groupindex) & set(m.groupindex) for m in members):
+                members.append(regex)
+                break
+        else:
+            groups.append([regex])
+    combined = []
+    for members in groups:
+        try:
+            pattern = re.compile(
+                b"|".join(b"(?:" + m.pattern + b")" for m in members))
+        except re.error:
+            # e.g. a member with global inline flags; check each on its own
+            combined.extend((m, [m]) for m in members)
+            continue
+        combined.append((pattern, members))
+    return combined
+
+
+def expand_message(template, match):
+    """Fill a message's {name} / {1} placeholders from a regex match."""
+    if "{" not in template:
+        return template
+
+    def capture(placeholder):
+        key = placeholder.group(1)
+        try:
+            value = match.group(int(key) if key.isdigit() else key)
+        except IndexError:
+            return placeholder.group(0)
+        return decode_line(value) if value is not None else ""
+    return PLACEHOLDER_RE.sub(capture, template)
+
+
+def expand_payload(payload, match):
+    # Voice payloads are the message itself, overlay payloads a dict
+    if isinstance(payload, dict):
+        return {**payload, 'message': expand_message(payload['message'], match)}
+    return expand_message(payload, match)
+
+
+def expand_alert(alert, match):
+    kind, payload, priority, exclusive = alert
+    return kind, expand_payload(payload, match), priority, exclusive
+
+
+class TriggerMatcher:
+    """Aho-Corasick automaton over the trigger patterns of one toon.
+
+    Every literal pattern of every trigger app is compiled into a single
+    automaton, so a line is scanned once no matter how many triggers are
+    active, and each pattern found in it is reported (overlapping patterns
+    included). Regex triggers ride on the same scan: each one's required
+    literal goes into the automaton and the regex only runs on lines that
+    contain it. Regexes without a usable literal are folded into combined
+    alternations that are checked once per line.
+
+    Every trigger found is reported, not just the first: matches come out
+    highest priority first, and an exclusive trigger suppresses the matches
+    of the same or lower priority, so which alert wins no longer depends on
+    the order triggers were saved in.
+
+    Regexes only see the first MAX_REGEX_LINE_BYTES of a line, and one whose
+    search overruns REGEX_TIME_BUDGET is dropped from the matcher and
+    reported in `disabled` (as are unsafe patterns saved before they were
+    checked), so a bad pattern costs at most one slow line.
+    """
+
+    def __init__(self, triggers):
+        """triggers: iterable of (pattern_bytes, kind, payload, priority,
+        exclusive)."""
+        self.goto = [{}]  # {byte: state} per state
+        self.fail = [0]
+        self.output = [()]  # patterns ending at each state
+        # Alerts are (kind, payload, priority, exclusive)
+        self.payloads = {}  # {pattern: (alert, ...)}
+        self.prefiltered = {}  # {literal: ((regex, alert), ...)}
+        self.disabled = []  # [(pattern, reason)] not yet reported
+        unfiltered = {}  # {regex: (alert, ...)}
+        regexes = {}
+        self.regex_patterns = {}  # {regex: pattern}
+        self.end_anchored = set()  # regexes using $ or \Z
+        for pattern, kind, payload, priority, exclusive in triggers:
+            if not pattern:
+                continue
+            alert = (kind, payload, priority, exclusive)
+            if pattern.startswith(REGEX_PREFIX.encode()):
+                if pattern not in regexes:
+                    regexes[pattern] = self.compile_regex(pattern)
+                regex = regexes[pattern]
+                if regex is None:
+                    continue
+                literal = required_literal(regex)
+                if len(literal) < MIN_PREFILTER_LITERAL:
+                    unfiltered[regex] = unfiltered.get(regex, ()) + (alert,)
+                    continue
+                self.prefiltered[literal] = self.prefiltered.get(literal, ()) + (
+                    (regex, alert),)
+                pattern, alerts = literal, ()
+            else:
+                alerts = (alert,)
+            if pattern not in self.payloads:
+                self.add_pattern(pattern)
+                self.payloads[pattern] = ()
+            self.payloads[pattern] += alerts
+        self.link()
+        # Whether the automaton's result can differ between lines that only
+        # differ in their numbers (see LineShapeCache)
+        self.digit_sensitive = any(
+            byte in DIGITS for pattern in self.payloads for byte in pattern)
+        self.unfiltered = [
+            (combined, [(regex, unfiltered[regex]) for regex in members])
+            for combined, members in combine_regexes(unfiltered)]
+
+    def compile_regex(self, pattern):
+        try:
+            regex = compile_trigger_regex(pattern.decode())
+        except re.error as e:
+            print(f"Skipping invalid regex trigger {pattern!r}: {e}")
+            return None
+        risk = backtracking_risk(regex)
+        if risk:
+            self.disabled.append((pattern, risk))
+            return None
+        self.regex_patterns[regex] = pattern
+        if _anchored_at_end(sre_parse.parse(regex.pattern, regex.flags)):
+            self.end_anchored.add(regex)
+        return regex
+
+    def __bool__(self):
+        return bool(self.payloads or self.unfiltered)
+
+    def add_pattern(self, pattern):
+        state = 0
+        for byte in pattern:
+            next_state = self.goto[state].get(byte)
+            if next_state is None:
+                next_state = len(self.goto)
+                self.goto.append({})
+                self.fail.append(0)
+                self.output.append(())
+                self.goto[state][byte] = next_state
+            state = next_state
+        self.output[state] += (pattern,)
+
+    def link(self):
+        # Breadth-first, so every fail target is finished before it is used
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for byte, next_state in self.goto[state].items():
+                queue.append(next_state)
+                fail = self.fail[state]
+                while fail and byte not in self.goto[fail]:
+                    fail = self.fail[fail]
+                self.fail[next_state] = self.goto[fail].get(byte, 0)
+                self.output[next_state] += self.output[self.fail[next_state]]
+
+    def match(self, line):
+        """Return (kind, payload, priority, exclusive) for every trigger found
+        in the line, highest priority first and cut off after the first
+        exclusive one; equal priorities keep the order literals end in.
+        Payloads of regex triggers have their message placeholders filled
+        in."""
+        return self.matches(line, self.scan(line))
+
+    def scan(self, line):
+        """Run the automaton over the line; returns the patterns found (in
+        the order they end) or None."""
+        goto = self.goto
+        fail = self.fail
+        output = self.output
+        found = None
+        state = 0
+        for byte in line:
+            while state and byte not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(byte, 0)
+            if output[state]:
+                if found is None:
+                    found = {}
+                for pattern in output[state]:
+                    found.setdefault(pattern, None)
+        return found
+
+    def matches(self, line, found):
+        """Resolve a scan() result, plus the regexes without a literal, into
+        the line's ordered matches (see match())."""
+        matches = []
+        slow = []
+        if found:
+            for pattern in found:
+                matches.extend(self.payloads[pattern])
+                for regex, alert in self.prefiltered.get(pattern, ()):
+                    match = self.search(regex, line, slow)
+                    if match:
+                        matches.append(expand_alert(alert, match))
+        for combined, members in self.unfiltered:
+            if self.search(combined, line, slow):
+                for regex, alerts in members:
+                    match = self.search(regex, line, slow)
+                    if match:
+                        matches.extend(expand_alert(alert, match) for alert in alerts)
+        for regex in slow:
+            self.drop_slow_regex(regex)
+        if len(matches) > 1:
+            # Exclusive matches sort ahead of their priority's others
+            matches.sort(key=lambda alert: (-alert[2], not alert[3]))
+        for index, alert in enumerate(matches):
+            if alert[3]:
+                del matches[index + 1:]
+                break
+        return matches
+
+    def search(self, regex, line, slow):
+        started = time.perf_counter()
+        match = regex.search(line, 0, MAX_REGEX_LINE_BYTES)
+        if time.perf_counter() - started > REGEX_TIME_BUDGET:
+            slow.append(regex)
+        if (match and match.end() == MAX_REGEX_LINE_BYTES < len(line)
+                and regex in self.end_anchored):
+            # The line goes on past the cap, so a $ cannot match there.
+            # Combined regexes are not checked: their members are
+            return None
+        return match
+
+    def drop_slow_regex(self, regex):
+        for index, (combined, members) in enumerate(self.unfiltered):
+            if combined is regex:
+                if len(members) > 1:
+                    # Which member is slow is unknown; check them one by
+                    # one from now on
+                    self.unfiltered[index:index + 1] = [
+                        (member, [(member, alerts)]) for member, alerts in members]
+                    return
+                regex = members[0][0]
+                break
+        pattern = self.regex_patterns.pop(regex, None)
+        if pattern is None:
+            return
+        self.prefiltered = {
+            literal: tuple(entry for entry in entries if entry[0] is not regex)
+            for literal, entries in self.prefiltered.items()}
+        unfiltered = []
+        for combined, members in self.unfiltered:
+            kept = [member for member in members if member[0] is not regex]
+            if len(kept) == len(members):
+                unfiltered.append((combined, members))
+            else:
+                unfiltered.extend((member[0], [member]) for member in kept)
+        self.unfiltered = unfiltered
+        self.disabled.append((pattern, (
+            f"A search took longer than {REGEX_TIME_BUDGET * 1000:.0f} ms, "
+            "so the trigger was disabled.")))
@@ -1,4 +1,5 @@
 from PyQt6.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QPushButton, QTableWidget, QTableWidgetItem, QLineEdit, QCheckBox, QLabel, QListWidget, QMessageBox
+from PyQt6.QtGui import QColor
 from PyQt6.QtCore import QSettings, Qt, QThread
 from gtts import gTTS
 import pygame
@@ -6,6 +7,8 @@ import os
 import re
 import time
 import urllib.parse
+from log_bus import EVENT_VOICE, EVENT_TOON, EVENT_TRIGGER_DISABLED
+from trigger_matcher import REGEX_PREFIX, is_regex_trigger, check_trigger_pattern
 
 
 class TTSThread(QThread):
@@ -30,6 +33,8 @@ class TTSThread(QThread):
 
 
 class VoiceNotificationsApp(QWidget):
+    LOG_EVENT_KINDS = (EVENT_VOICE, EVENT_TOON, EVENT_TRIGGER_DISABLED)
+
     def __init__(self, log_dir, toon_name="Unknown"):
         super().__init__()
         self.setWindowTitle("Voice Notifications")
@@ -40,7 +45,8 @@ class VoiceNotificationsApp(QWidget):
         self.settings = QSettings(os.path.join(
             config_dir, "voice-notifications.ini"), QSettings.Format.IniFormat)
         self.settings.remove("General")  # Clear stale [General] section
-        self.tts_thread = None
+        self.tts_thread = None  # Until its finished signal is handled
+        self.tts_queue = []
         self.enabled = self.settings.value("voice_enabled", False, type=bool)
         self.master_triggers = {}
         self.settings.beginGroup("master_triggers")
@@ -70,18 +76,49 @@ class VoiceNotificationsApp(QWidget):
             for key in self.settings.allKeys():
                 self.toon_triggers[toon].append(self.decode_key(key))
             self.settings.endGroup()
-        self.log_file = None
-        self.log_path = None
-        self.log_position = 0
+        # Triggers scoped to a zone only fire while the toon is in it
+        self.trigger_zones = {}  # {pattern: zone}
+        self.settings.beginGroup("trigger_zones")
+        for key in self.settings.allKeys():
+            self.trigger_zones[self.decode_key(key)] = self.settings.value(key)
+        self.settings.endGroup()
+        # Every matching trigger fires, highest priority first; an exclusive
+        # one silences the others of its priority and below
+        self.trigger_priority = {}  # {pattern: priority}
+        self.settings.beginGroup("trigger_priority")
+        for key in self.settings.allKeys():
+            self.trigger_priority[self.decode_key(key)] = int(self.settings.value(key))
+        self.settings.endGroup()
+        self.exclusive_triggers = set()
+        self.settings.beginGroup("trigger_exclusive")
+        for key in self.settings.allKeys():
+            self.exclusive_triggers.add(self.decode_key(key))
+        self.settings.endGroup()
+        # Regex triggers the log worker found unsafe or too slow, until edited
+        self.disabled_triggers = {}  # {pattern: reason}
+        self.settings.beginGroup("disabled_triggers")
+        for key in self.settings.allKeys():
+            self.disabled_triggers[self.decode_key(key)] = self.settings.value(key)
+        self.settings.endGroup()
+        # {toon: ((pattern_bytes, message, zone, priority, exclusive), ...)}
+        self.active_triggers = {}
+        self.log_bus = None
+        self.rebuild_active_triggers()
         self.setup_ui()
         self.update_active_toon_label()
 
     def encode_key(self, key):
-        """Replace spaces with underscores for QSettings keys."""
+        """Replace spaces with underscores for QSettings keys. Regex patterns
+        are percent-encoded instead, since QSettings treats "/" and "\\" in
+        keys as group separators."""
+        if is_regex_trigger(key):
+            return REGEX_PREFIX + urllib.parse.quote(key[len(REGEX_PREFIX):], safe="")
         return key.replace(" ", "_")
 
     def decode_key(self, key):
         """Replace underscores with spaces for trigger patterns."""
+        if is_regex_trigger(key):
+            return REGEX_PREFIX + urllib.parse.unquote(key[len(REGEX_PREFIX):])
         return key.replace("_", " ")
 
     def update_active_toon_label(self):
@@ -182,10 +219,13 @@ class VoiceNotificationsApp(QWidget):
 
         # Toon Table
         self.table = QTableWidget()
-        self.table.setColumnCount(2)
-        self.table.setHorizontalHeaderLabels(["Log Pattern", "Spoken Message"])
+        self.table.setColumnCount(5)
+        self.table.setHorizontalHeaderLabels(
+            ["Log Pattern", "Spoken Message", "Zone", "Priority", "Exclusive"])
         self.table.setColumnWidth(0, 280)
         self.table.setColumnWidth(1, 280)
+        self.table.setColumnWidth(2, 150)
+        self.table.setColumnWidth(3, 60)
         self.table.horizontalHeader().setStretchLastSection(True)
         self.table.itemChanged.connect(self.update_trigger)
         self.trigger_layout.addWidget(self.table)
@@ -194,12 +234,21 @@ class VoiceNotificationsApp(QWidget):
         self.input_layout = QHBoxLayout()
         self.pattern_input = QLineEdit()
         self.pattern_input.setPlaceholderText(
-            "Enter log pattern (e.g., Your root has broken)")
+            "Enter log pattern (e.g., Your root has broken, or re:(\\w+) tells you)")
         self.input_layout.addWidget(self.pattern_input)
         self.message_input = QLineEdit()
         self.message_input.setPlaceholderText(
-            "Enter spoken message (e.g., Root has broken!)")
+            "Enter spoken message (e.g., Root has broken!, or Tell from {1})")
         self.input_layout.addWidget(self.message_input)
+        self.zone_input = QLineEdit()
+        self.zone_input.setPlaceholderText(
+            "Zone (optional, e.g., Plane of Fear)")
+        self.input_layout.addWidget(self.zone_input)
+        self.priority_input = QLineEdit()
+        self.priority_input.setPlaceholderText("Priority (optional, e.g., 10)")
+        self.input_layout.addWidget(self.priority_input)
+        self.exclusive_input = QCheckBox("Exclusive")
+        self.input_layout.addWidget(self.exclusive_input)
         self.input_layout_widget = QWidget()
         self.input_layout_widget.setLayout(self.input_layout)
         self.trigger_layout.addWidget(self.input_layout_widget)
@@ -342,11 +391,32 @@ class VoiceNotificationsApp(QWidget):
                 pattern_item = QTableWidgetItem(pattern)
                 pattern_item.setFlags(
                     pattern_item.flags() | Qt.ItemFlag.ItemIsEditable)
+                # Renames are told from the pattern the row was loaded with
+                pattern_item.setData(Qt.ItemDataRole.UserRole, pattern)
+                if pattern in self.disabled_triggers:
+                    pattern_item.setForeground(QColor("#d32f2f"))
+                    pattern_item.setToolTip(
+                        f"Disabled: {self.disabled_triggers[pattern]} Edit the trigger to re-enable it.")
                 self.table.setItem(row, 0, pattern_item)
                 message_item = QTableWidgetItem(message)
                 message_item.setFlags(
                     message_item.flags() | Qt.ItemFlag.ItemIsEditable)
                 self.table.setItem(row, 1, message_item)
+                zone_item = QTableWidgetItem(self.trigger_zones.get(pattern, ""))
+                zone_item.setFlags(
+                    zone_item.flags() | Qt.ItemFlag.ItemIsEditable)
+                self.table.setItem(row, 2, zone_item)
+                priority_item = QTableWidgetItem(
+                    str(self.trigger_priority.get(pattern, 0)))
+                priority_item.setFlags(
+                    priority_item.flags() | Qt.ItemFlag.ItemIsEditable)
+                self.table.setItem(row, 3, priority_item)
+                exclusive_item = QTableWidgetItem()
+                exclusive_item.setFlags(
+                    (exclusive_item.flags() | Qt.ItemFlag.ItemIsUserCheckable) & ~Qt.ItemFlag.ItemIsEditable)
+                exclusive_item.setCheckState(
+                    Qt.CheckState.Checked if pattern in self.exclusive_triggers else Qt.CheckState.Unchecked)
+                self.table.setItem(row, 4, exclusive_item)
         self.table.itemChanged.connect(self.update_trigger)
 
     def filter_triggers(self):
@@ -440,19 +510,35 @@ class VoiceNotificationsApp(QWidget):
             if self.current_toon == toon_name:
                 self.current_toon = "Unknown"
                 self.update_active_toon_label()
+            self.rebuild_active_triggers()
 
     def add_trigger(self):
         pattern = self.pattern_input.text().strip()
         message = self.message_input.text().strip()
+        zone = self.zone_input.text().strip()
+        exclusive = self.exclusive_input.isChecked()
+        error = check_trigger_pattern(pattern)
+        if error:
+            QMessageBox.warning(self, "Invalid Pattern", error)
+            return
+        priority = self.parse_priority(self.priority_input.text())
+        if priority is None:
+            return
         if pattern and message:
             self.master_triggers[pattern] = message
             self.settings.beginGroup("master_triggers")
             self.settings.setValue(self.encode_key(pattern), message)
             self.settings.endGroup()
+            self.set_trigger_options(pattern, zone, priority, exclusive)
+            self.set_trigger_disabled(pattern, "")
             self.settings.sync()
+            self.rebuild_active_triggers()
             self.load_triggers()
             self.pattern_input.clear()
             self.message_input.clear()
+            self.zone_input.clear()
+            self.priority_input.clear()
+            self.exclusive_input.setChecked(False)
 
     def delete_trigger(self):
         selected = self.table.selectedItems()
@@ -463,6 +549,8 @@ class VoiceNotificationsApp(QWidget):
                 self.settings.beginGroup("master_triggers")
                 self.settings.remove(self.encode_key(pattern))
                 self.settings.endGroup()
+                self.set_trigger_options(pattern)
+                self.set_trigger_disabled(pattern, "")
                 for toon in self.toon_triggers:
                     if pattern in self.toon_triggers[toon]:
                         self.toon_triggers[toon].remove(pattern)
@@ -470,23 +558,40 @@ class VoiceNotificationsApp(QWidget):
                         self.settings.remove(self.encode_key(pattern))
                         self.settings.endGroup()
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_triggers()
 
     def update_trigger(self, item):
         row = item.row()
         pattern_item = self.table.item(row, 0)
         message_item = self.table.item(row, 1)
-        if pattern_item and message_item:
+        zone_item = self.table.item(row, 2)
+        priority_item = self.table.item(row, 3)
+        exclusive_item = self.table.item(row, 4)
+        if (pattern_item and message_item and zone_item
+                and priority_item and exclusive_item):
             new_pattern = pattern_item.text().strip()
             new_message = message_item.text().strip()
+            error = check_trigger_pattern(new_pattern)
+            if error:
+                QMessageBox.warning(self, "Invalid Pattern", error)
+                self.load_triggers()  # Revert
+                return
+            new_priority = self.parse_priority(priority_item.text())
+            if new_priority is None:
+                self.load_triggers()  # Revert
+                return
             if new_pattern and new_message:
-                old_pattern = next((p for p, m in self.master_triggers.items(
-                ) if p != new_pattern and m == self.table.item(row, 1).text()), None)
-                if old_pattern and old_pattern in self.master_triggers:
+                # Only a pattern edit renames; other columns update it in place
+                old_pattern = pattern_item.data(Qt.ItemDataRole.UserRole)
+                if (item.column() == 0 and old_pattern != new_pattern
+                        and old_pattern in self.master_triggers):
                     del self.master_triggers[old_pattern]
                     self.settings.beginGroup("master_triggers")
                     self.settings.remove(self.encode_key(old_pattern))
                     self.settings.endGroup()
+                    self.set_trigger_options(old_pattern)
+                    self.set_trigger_disabled(old_pattern, "")
                     for toon in self.toon_triggers:
                         if old_pattern in self.toon_triggers[toon]:
                             self.toon_triggers[toon].remove(old_pattern)
@@ -501,9 +606,64 @@ class VoiceNotificationsApp(QWidget):
                 self.settings.setValue(
                     self.encode_key(new_pattern), new_message)
                 self.settings.endGroup()
+                self.set_trigger_options(
+                    new_pattern, zone_item.text().strip(), new_priority,
+                    exclusive_item.checkState() == Qt.CheckState.Checked)
+                self.set_trigger_disabled(new_pattern, "")
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_triggers()
 
+    def set_trigger_disabled(self, pattern, reason):
+        # An empty reason enables the trigger again
+        self.settings.beginGroup("disabled_triggers")
+        if reason:
+            self.disabled_triggers[pattern] = reason
+            self.settings.setValue(self.encode_key(pattern), reason)
+        else:
+            self.disabled_triggers.pop(pattern, None)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+
+    def parse_priority(self, text):
+        try:
+            return int(text.strip() or 0)
+        except ValueError:
+            QMessageBox.warning(self, "Invalid Input",
+                                "Priority must be a whole number.")
+            return None
+
+    def set_trigger_options(self, pattern, zone="", priority=0, exclusive=False):
+        # The defaults make a trigger global, priority 0 and not exclusive
+        self.set_trigger_zone(pattern, zone)
+        self.settings.beginGroup("trigger_priority")
+        if priority:
+            self.trigger_priority[pattern] = priority
+            self.settings.setValue(self.encode_key(pattern), priority)
+        else:
+            self.trigger_priority.pop(pattern, None)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+        self.settings.beginGroup("trigger_exclusive")
+        if exclusive:
+            self.exclusive_triggers.add(pattern)
+            self.settings.setValue(self.encode_key(pattern), "true")
+        else:
+            self.exclusive_triggers.discard(pattern)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+
+    def set_trigger_zone(self, pattern, zone):
+        """Scope a trigger to a zone; an empty zone makes it global again."""
+        self.settings.beginGroup("trigger_zones")
+        if zone:
+            self.trigger_zones[pattern] = zone
+            self.settings.setValue(self.encode_key(pattern), zone)
+        else:
+            self.trigger_zones.pop(pattern, None)
+            self.settings.remove(self.encode_key(pattern))
+        self.settings.endGroup()
+
     def add_toon_trigger(self, row, column):
         if row >= 0:
             pattern = self.master_triggers_table.item(row, 0).text()
@@ -515,6 +675,7 @@ class VoiceNotificationsApp(QWidget):
                 self.settings.setValue(self.encode_key(pattern), "true")
                 self.settings.endGroup()
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_toon_triggers()
 
     def remove_toon_trigger(self, row, column):
@@ -528,37 +689,81 @@ class VoiceNotificationsApp(QWidget):
                 self.settings.remove(self.encode_key(pattern))
                 self.settings.endGroup()
                 self.settings.sync()
+                self.rebuild_active_triggers()
                 self.load_toon_triggers()
 
     def toggle_notifications(self, state):
         self.enabled = state == Qt.CheckState.Checked.value
         self.settings.setValue("voice_enabled", self.enabled)
         self.settings.sync()
-
-    def process_log_line(self, line):
-        if not self.enabled or not self.current_toon or self.current_toon not in self.toon_triggers:
+        self.rebuild_active_triggers()
+
+    def attach_log_bus(self, log_bus):
+        self.log_bus = log_bus
+        log_bus.subscribe(self.LOG_EVENT_KINDS, self.handle_log_event)
+        self.rebuild_active_triggers()
+
+    def rebuild_active_triggers(self):
+        """Hand every toon's triggers to the log bus, which compiles them into
+        the matchers the log worker runs (several toons may be tailed, each
+        matched against its global triggers plus its current zone's)."""
+        self.active_triggers = {
+            toon: tuple(
+                (pattern.encode(), self.master_triggers[pattern],
+                 self.trigger_zones.get(pattern), self.trigger_priority.get(pattern, 0),
+                 pattern in self.exclusive_triggers)
+                for pattern in patterns
+                if self.master_triggers.get(pattern)
+                and pattern not in self.disabled_triggers)
+            for toon, patterns in self.toon_triggers.items()
+        } if self.enabled else {}
+        if self.log_bus:
+            self.log_bus.set_triggers(EVENT_VOICE, self.active_triggers)
+
+    def speak(self, message, priority=0):
+        # Queued messages are spoken highest priority first
+        index = next((i for i, (queued, _) in enumerate(self.tts_queue)
+                      if queued < priority), len(self.tts_queue))
+        self.tts_queue.insert(index, (priority, message))
+        if self.tts_thread is None:
+            self.speak_next()
+
+    def speak_next(self):
+        # Only runs when nothing is being spoken: from speak(), or from the
+        # finished signal of the thread that was. isRunning() goes False
+        # before that signal arrives, so it cannot tell when to start.
+        if self.tts_thread:
+            self.tts_thread.wait()
+            self.tts_thread = None
+        if not self.tts_queue:
+            return
+        self.tts_thread = TTSThread(self.tts_queue.pop(0)[1])
+        self.tts_thread.finished.connect(self.speak_next)
+        self.tts_thread.start()
+
+    def handle_log_event(self, event):
+        if event.kind == EVENT_VOICE:
+            self.speak(event.data, event.priority)
+        elif event.kind == EVENT_TOON:
+            self.set_active_toon(event.data[0])
+        elif event.kind == EVENT_TRIGGER_DISABLED:
+            self.disable_trigger(*event.data)
+
+    def disable_trigger(self, pattern, reason):
+        if pattern not in self.master_triggers or pattern in self.disabled_triggers:
             return
-        for pattern in self.toon_triggers.get(self.current_toon, []):
-            if pattern in line:
-                message = self.master_triggers.get(pattern, "")
-                if message:
-                    if self.tts_thread and self.tts_thread.isRunning():
-                        self.tts_thread.wait()
-                    self.tts_thread = TTSThread(message)
-                    self.tts_thread.start()
-                    break
-
-    def update_log_info(self, log_file, log_path, log_position, toon_name):
-        if self.log_file and self.log_file != log_file:
-            self.log_file.close()
-        self.log_file = log_file
-        self.log_path = log_path
-        self.log_position = log_position
+        print(f"Disabling trigger {pattern!r}: {reason}")
+        self.set_trigger_disabled(pattern, reason)
+        self.settings.sync()
+        self.rebuild_active_triggers()
+        self.load_triggers()
+
+    def set_active_toon(self, toon_name):
         self.current_toon = toon_name
         self.update_active_toon_label()
 
     def closeEvent(self, event):
-        if self.tts_thread and self.tts_thread.isRunning():
+        if self.tts_thread:
             self.tts_thread.wait()
         self.hide()
         event.accept()
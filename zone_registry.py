@@ -0,0 +1,102 @@
+import json
+import os
+
+DEFAULT_ZONES_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data", "zones.json")
+# Respawn time (seconds) of zones missing from the data file
+DEFAULT_RESPAWN = 400  # 6:40
+
+
+def normalize_name(name):
+    """Lookup key for zone and mob names: case, runs of spaces and the
+    ` / ' spellings (Ak`Anon, Ak'Anon) do not matter."""
+    return " ".join(name.replace("`", "'").lower().split())
+
+
+class ZoneRegistry:
+    """Zone names and respawn times, read from data/zones.json on first use.
+
+    Each zone is listed under its entry name (as in "You have entered ...")
+    with an optional /who name, extra aliases, its respawn time and optional
+    per-mob times matched by mob name prefix:
+
+        "High Keep": {"respawn": 600, "mobs": {"a High Keep guard": 1200}}
+
+    Every name of a zone is indexed under its normalized form, so resolving
+    a zone is one dictionary lookup. Mob times are resolved once per mob
+    name and then cached.
+    """
+
+    def __init__(self, path=DEFAULT_ZONES_PATH):
+        self.path = path
+        self.index = None  # {normalized name: zone record}
+        self.default_respawn = DEFAULT_RESPAWN
+
+    def load(self):
+        # Read from both the GUI and the log worker thread; the index is
+        # built aside and assigned once, so a racing second load is harmless
+        index = {}
+        try:
+            with open(self.path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError) as e:
+            print(f"Error loading zone data from {self.path}: {e}")
+            data = {}
+        self.default_respawn = data.get("default_respawn", DEFAULT_RESPAWN)
+        for name, info in data.get("zones", {}).items():
+            zone = {
+                "name": name,
+                "who": info.get("who", name),
+                "respawn": info.get("respawn", self.default_respawn),
+                # Longest prefix first, so the most specific one wins
+                "mobs": sorted(((normalize_name(prefix), seconds)
+                                for prefix, seconds in info.get("mobs", {}).items()),
+                               key=lambda mob: len(mob[0]), reverse=True),
+                "mob_respawns": {},  # {normalized mob name: seconds}
+            }
+            for alias in [name, zone["who"]] + info.get("aliases", []):
+                key = normalize_name(alias)
+                if key in index and index[key] is not zone:
+                    print(f"Zone name {alias!r} is listed for both {index[key]['name']} and {name}")
+                    continue
+                index[key] = zone
+        self.index = index
+
+    def zone(self, name):
+        if self.index is None:
+            self.load()
+        return self.index.get(normalize_name(name)) if name else None
+
+    def canonical(self, name):
+        """The entry name of a zone given any of its names."""
+        zone = self.zone(name)
+        return zone["name"] if zone else name
+
+    def who_name(self, name):
+        zone = self.zone(name)
+        return zone["who"] if zone else name
+
+    def aliases(self):
+        """{name: entry name} for every known name of every zone."""
+        if self.index is None:
+            self.load()
+        return {key: zone["name"] for key, zone in self.index.items()}
+
+    def respawn(self, zone_name, mob=None):
+        """Respawn time (seconds) of `mob` in the zone, or of the zone when
+        no mob is given or no per-mob time matches it."""
+        zone = self.zone(zone_name)
+        if zone is None:
+            return self.default_respawn
+        if not mob or not zone["mobs"]:
+            return zone["respawn"]
+        key = normalize_name(mob)
+        seconds = zone["mob_respawns"].get(key)
+        if seconds is None:
+            seconds = next((seconds for prefix, seconds in zone["mobs"]
+                            if key.startswith(prefix)), zone["respawn"])
+            zone["mob_respawns"][key] = seconds
+        return seconds
+
+
+# Shared by everything that needs zone names or respawn times
+ZONES = ZoneRegistry()